@@ -0,0 +1,114 @@
+"""Accuracy versus latency of the TimesFM precision modes on CPU.
+
+Run from the forecast directory (needs timesfm[torch] and the checkpoint):
+
+    python -m bench.precision
+    python -m bench.precision --modes fp32,int8 --series 64 --horizon 12 --json precision.json
+
+Every mode forecasts the same synthetic monthly series. Accuracy is reported
+as MAPE against the held-out tail and as the mean deviation from the fp32
+forecast, so the cost of a cheaper mode is visible next to its speed-up.
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+
+import numpy as np
+
+import engine
+from config import TIMESFM_HORIZON_LEN
+
+
+def make_series(count: int, horizon: int, seed: int = 7) -> list[tuple[list[float], list[float]]]:
+    """(history, actual future) pairs shaped like freight and tariff series."""
+    rng = np.random.default_rng(seed)
+    series = []
+    for _ in range(count):
+        length = int(rng.integers(24, 121)) + horizon
+        t = np.arange(length)
+        level = rng.uniform(3, 3000)
+        seasonal = np.sin(2 * np.pi * t / 12 + rng.uniform(0, 2 * np.pi)) * level * rng.uniform(0.05, 0.3)
+        trend = t * level * rng.uniform(-0.004, 0.006)
+        noise = rng.normal(0, level * 0.03, length)
+        values = np.maximum(level + seasonal + trend + noise, level * 0.1)
+        series.append((values[:-horizon].tolist(), values[-horizon:].tolist()))
+    return series
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def run_mode(precision: str, series, horizon: int, warmup: int = 2) -> dict:
+    start = time.perf_counter()
+    # Measuring the unverified modes is what this benchmark is for.
+    model = engine.build_model(precision, allow_unverified=True)
+    load_s = time.perf_counter() - start
+
+    for history, _ in series[:warmup]:
+        engine._run_timesfm_forecast(history, horizon, model=model)
+
+    latencies, forecasts, errors = [], [], []
+    for history, actual in series:
+        start = time.perf_counter()
+        points, _, _ = engine._run_timesfm_forecast(history, horizon, model=model)
+        latencies.append(time.perf_counter() - start)
+        forecasts.append(points)
+        errors.append(np.mean(np.abs(np.array(points) - actual) / np.abs(actual)) * 100)
+
+    ordered = sorted(latencies)
+    return {
+        "precision": precision,
+        "load_s": load_s,
+        "p50_ms": _percentile(ordered, 50) * 1000,
+        "p95_ms": _percentile(ordered, 95) * 1000,
+        "series_per_s": len(series) / sum(latencies),
+        "mape_pct": statistics.fmean(errors),
+        "forecasts": forecasts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TimesFM precision benchmark")
+    parser.add_argument("--modes", default=",".join(engine.PRECISIONS))
+    parser.add_argument("--series", type=int, default=32)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    args = parser.parse_args()
+    if not 1 <= args.horizon <= TIMESFM_HORIZON_LEN:
+        parser.error(f"--horizon must be between 1 and TIMESFM_HORIZON_LEN ({TIMESFM_HORIZON_LEN})")
+
+    logging.getLogger("forecast").setLevel(logging.WARNING)
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    if "fp32" not in modes:
+        modes.insert(0, "fp32")  # the reference every other mode is compared with
+    series = make_series(args.series, args.horizon)
+
+    results = [run_mode(mode, series, args.horizon) for mode in modes]
+    reference = next(r for r in results if r["precision"] == "fp32")
+    print(f"{args.series} series, horizon {args.horizon}")
+    print(f"{'mode':6} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'series/s':>9} {'speed-up':>8} {'MAPE %':>7} {'vs fp32 %':>9}")
+    for r in results:
+        deviation = statistics.fmean(
+            np.mean(np.abs(np.array(f) - ref) / np.maximum(np.abs(ref), 1e-9)) * 100
+            for f, ref in zip(r["forecasts"], reference["forecasts"])
+        )
+        r["deviation_from_fp32_pct"] = deviation
+        r["speedup"] = r["series_per_s"] / reference["series_per_s"]
+        print(
+            f"{r['precision']:6} {r['load_s']:7.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+            f"{r['series_per_s']:9.1f} {r['speedup']:7.2f}x {r['mape_pct']:7.2f} {deviation:9.3f}"
+        )
+
+    if args.json:
+        for r in results:
+            del r["forecasts"]
+        with open(args.json, "w") as f:
+            json.dump({"series": args.series, "horizon": args.horizon, "modes": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,3 +11,33 @@ FORECAST_API_KEY = os.getenv("FORECAST_API_KEY", "")
 PORT = int(os.getenv("PORT", "8200"))
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
 TIMESFM_MODEL = os.getenv("TIMESFM_MODEL", "google/timesfm-2.0-200m-pytorch")
+# CPU inference: fp32, bf16 (autocast) or int8 (dynamically quantized Linear
+# layers). Context and horizon caps bound the padded input and the output.
+TIMESFM_BACKEND = os.getenv("TIMESFM_BACKEND", "cpu")
+TIMESFM_PRECISION = os.getenv("TIMESFM_PRECISION", "fp32").lower()
+# bf16 and int8 have not been measured against fp32 yet (bench/precision.py);
+# the service refuses them unless this is set.
+TIMESFM_ALLOW_UNVERIFIED_PRECISION = os.getenv("TIMESFM_ALLOW_UNVERIFIED_PRECISION", "false").lower() in ("1", "true", "yes")
+TIMESFM_CONTEXT_LEN = int(os.getenv("TIMESFM_CONTEXT_LEN", "256"))
+TIMESFM_HORIZON_LEN = int(os.getenv("TIMESFM_HORIZON_LEN", "32"))
+# Load the model in the background at startup instead of on the first request.
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "true").lower() in ("1", "true", "yes")
+# gunicorn.conf.py: worker processes, and torch intra-op threads per worker
+# (0 splits the CPUs evenly between workers).
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+# Bundled HS-code descriptions and baseline tariff rates, and the cache of
+# tariff forecasts shared by codes that resolve to the same baseline.
+HS_INDEX_PATH = os.getenv(
+    "HS_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hs_tariffs.tsv")
+)
+TARIFF_CACHE_SIZE = int(os.getenv("TARIFF_CACHE_SIZE", "2048"))
+TARIFF_CACHE_TTL_SECONDS = float(os.getenv("TARIFF_CACHE_TTL_SECONDS", "3600"))
+
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/loxtr-forecast-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "5"))
+SLOW_LOG_SIZE = int(os.getenv("SLOW_LOG_SIZE", "100"))
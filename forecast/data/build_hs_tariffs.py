@@ -0,0 +1,181 @@
+"""Regenerate hs_tariffs.tsv, the sorted file hs_index.py memory-maps.
+
+    python data/build_hs_tariffs.py
+
+Rates are indicative applied MFN simple averages per HS section, rounded,
+with heading-level overrides where a product is well known to differ and
+zero-duty preferences for the customs union and FTAs our users trade under
+(rules of origin assumed met). Refresh them from WITS / TARIC before quoting
+them to anyone as a duty.
+"""
+from pathlib import Path
+
+OUTPUT = Path(__file__).with_name("hs_tariffs.tsv")
+
+CHAPTERS = {
+    "01": "Live animals", "02": "Meat and edible meat offal", "03": "Fish and crustaceans",
+    "04": "Dairy produce; eggs; honey", "05": "Other products of animal origin",
+    "06": "Live trees and plants; cut flowers", "07": "Edible vegetables", "08": "Edible fruit and nuts",
+    "09": "Coffee, tea and spices", "10": "Cereals", "11": "Milling products; malt; starches",
+    "12": "Oil seeds and oleaginous fruits", "13": "Lacs, gums and resins",
+    "14": "Vegetable plaiting materials", "15": "Animal or vegetable fats and oils",
+    "16": "Preparations of meat or fish", "17": "Sugars and sugar confectionery",
+    "18": "Cocoa and cocoa preparations", "19": "Preparations of cereals, flour or milk; bakery products",
+    "20": "Preparations of vegetables, fruit or nuts", "21": "Miscellaneous edible preparations",
+    "22": "Beverages, spirits and vinegar", "23": "Food industry residues; animal fodder",
+    "24": "Tobacco", "25": "Salt; sulphur; earths and stone; cement", "26": "Ores, slag and ash",
+    "27": "Mineral fuels and oils", "28": "Inorganic chemicals", "29": "Organic chemicals",
+    "30": "Pharmaceutical products", "31": "Fertilisers", "32": "Tanning or dyeing extracts; paints",
+    "33": "Essential oils; perfumery and cosmetics", "34": "Soap, waxes and cleaning preparations",
+    "35": "Albuminoidal substances; glues; enzymes", "36": "Explosives; matches",
+    "37": "Photographic goods", "38": "Miscellaneous chemical products", "39": "Plastics and articles thereof",
+    "40": "Rubber and articles thereof", "41": "Raw hides, skins and leather",
+    "42": "Articles of leather; handbags; travel goods", "43": "Furskins and artificial fur",
+    "44": "Wood and articles of wood", "45": "Cork", "46": "Basketware and wickerwork",
+    "47": "Pulp of wood", "48": "Paper and paperboard", "49": "Printed books and newspapers",
+    "50": "Silk", "51": "Wool and animal hair", "52": "Cotton", "53": "Other vegetable textile fibres",
+    "54": "Man-made filaments", "55": "Man-made staple fibres", "56": "Wadding, felt, twine and rope",
+    "57": "Carpets and textile floor coverings", "58": "Special woven fabrics; lace",
+    "59": "Coated and laminated textile fabrics", "60": "Knitted or crocheted fabrics",
+    "61": "Apparel, knitted or crocheted", "62": "Apparel, not knitted or crocheted",
+    "63": "Other made up textile articles", "64": "Footwear", "65": "Headgear",
+    "66": "Umbrellas and walking sticks", "67": "Prepared feathers; artificial flowers",
+    "68": "Articles of stone, plaster and cement", "69": "Ceramic products", "70": "Glass and glassware",
+    "71": "Pearls, precious stones and metals; jewellery", "72": "Iron and steel",
+    "73": "Articles of iron or steel", "74": "Copper", "75": "Nickel", "76": "Aluminium",
+    "78": "Lead", "79": "Zinc", "80": "Tin", "81": "Other base metals; cermets",
+    "82": "Tools and cutlery of base metal", "83": "Miscellaneous articles of base metal",
+    "84": "Machinery and mechanical appliances", "85": "Electrical machinery and equipment",
+    "86": "Railway locomotives and rolling stock", "87": "Vehicles other than railway",
+    "88": "Aircraft and spacecraft", "89": "Ships and boats",
+    "90": "Optical, measuring and medical instruments", "91": "Clocks and watches",
+    "92": "Musical instruments", "93": "Arms and ammunition", "94": "Furniture; bedding; lamps",
+    "95": "Toys, games and sports equipment", "96": "Miscellaneous manufactured articles",
+    "97": "Works of art and antiques",
+}
+
+HEADINGS = {
+    "0805": "Citrus fruit", "0806": "Grapes", "0813": "Dried fruit",
+    "1509": "Olive oil", "2009": "Fruit juices", "2204": "Wine of fresh grapes",
+    "2523": "Portland cement", "3004": "Medicaments in measured doses",
+    "3920": "Plates and sheets of plastics", "4011": "New pneumatic tyres of rubber",
+    "5205": "Cotton yarn", "5701": "Carpets, knotted", "5702": "Carpets, woven",
+    "6109": "T-shirts and vests, knitted", "6203": "Men's suits, trousers and shorts",
+    "6204": "Women's suits, dresses and skirts", "6302": "Bed, table and toilet linen",
+    "6403": "Footwear with leather uppers", "6907": "Ceramic tiles",
+    "7208": "Flat-rolled iron or steel, hot-rolled", "7214": "Bars and rods of iron or steel",
+    "7306": "Tubes and pipes of iron or steel", "7308": "Structures of iron or steel",
+    "7601": "Unwrought aluminium", "7604": "Aluminium bars, rods and profiles",
+    "8414": "Pumps for air; compressors; fans", "8418": "Refrigerators and freezers",
+    "8450": "Washing machines", "8481": "Taps, cocks, valves and similar appliances",
+    "8501": "Electric motors and generators", "8516": "Electric heaters, ovens and cookers",
+    "8528": "Monitors and television receivers", "8541": "Semiconductor devices; photovoltaic cells",
+    "8544": "Insulated wire and cable", "8703": "Motor cars for the transport of persons",
+    "8704": "Motor vehicles for the transport of goods", "8708": "Parts and accessories of motor vehicles",
+    "9403": "Other furniture and parts thereof",
+}
+
+SUBHEADINGS = {
+    "848110": "Pressure-reducing valves", "848120": "Valves for oleohydraulic or pneumatic transmissions",
+    "848130": "Check (non-return) valves", "848140": "Safety or relief valves",
+    "848180": "Other taps, cocks and valves", "848190": "Parts of taps, cocks and valves",
+    "870323": "Cars, spark-ignition, 1500-3000 cc", "870380": "Cars, electric motor only",
+    "854143": "Photovoltaic cells assembled in modules",
+}
+
+# HS sections as (first chapter, last chapter).
+SECTIONS = [
+    (1, 5), (6, 14), (15, 15), (16, 24), (25, 27), (28, 38), (39, 40), (41, 43), (44, 46), (47, 49), (50, 63),
+    (64, 67), (68, 70), (71, 71), (72, 83), (84, 85), (86, 89), (90, 92), (93, 93), (94, 96), (97, 97),
+]
+# Indicative MFN simple average ad-valorem rate per section, in percent.
+SECTION_RATES = {
+    "EU": [15, 10, 6, 15, 0.5, 4.5, 5, 3, 2.5, 0, 8, 8, 3.5, 0.5, 2, 2, 5, 2, 2.5, 2.5, 0],
+    "US": [4, 3.5, 3, 8, 0.5, 3, 3.5, 4, 1.5, 0, 8, 11, 4.5, 2, 1.5, 1.2, 3, 2, 1, 2.5, 0],
+    "GB": [13, 8, 4, 13, 0, 3.5, 4, 2.5, 1.5, 0, 7, 7, 3, 0, 1.5, 1.5, 4, 1.5, 2, 2, 0],
+    "TR": [40, 20, 15, 30, 1, 4, 5, 3, 3, 0, 8, 9, 3.5, 0.5, 2, 2, 6, 2, 2.5, 2.5, 0],
+    "CN": [12, 11, 10, 15, 3, 6, 7, 9, 4, 5, 8, 12, 10, 7, 6, 6, 10, 7, 13, 8, 5],
+}
+# Heading overrides: "rate" or "YYYY-MM=rate;YYYY-MM=rate" for rates that
+# changed (each step applies from its month on).
+OVERRIDES = {
+    ("EU", "0805"): "16", ("EU", "1509"): "12", ("EU", "6109"): "12", ("EU", "6204"): "12",
+    ("EU", "6403"): "8", ("EU", "7208"): "0", ("EU", "8481"): "2.2", ("EU", "848180"): "2.2",
+    ("EU", "8703"): "10", ("EU", "8704"): "22", ("EU", "8708"): "3",
+    ("US", "6109"): "16.5", ("US", "6204"): "14", ("US", "6403"): "8.5", ("US", "6907"): "8.5",
+    ("US", "7208"): "2015-01=0;2018-03=25", ("US", "7306"): "2015-01=0;2018-03=25",
+    ("US", "7601"): "2015-01=2.6;2018-03=12.6", ("US", "8481"): "2", ("US", "848180"): "4",
+    ("US", "854143"): "2015-01=0;2018-02=30;2022-02=14.75",
+    ("US", "8703"): "2.5", ("US", "8704"): "25", ("US", "8708"): "2.5",
+    ("TR", "0805"): "54", ("TR", "2204"): "70", ("TR", "6109"): "12", ("TR", "8703"): "10",
+    ("CN", "8703"): "2015-01=25;2018-07=15", ("CN", "8708"): "2015-01=10;2018-07=6",
+    ("CN", "2204"): "14", ("CN", "8481"): "5",
+}
+# Zero-duty preferences as {(destination, origin): first chapter covered}.
+# The EU-Turkey customs union and the UK-Turkey FTA cover industrial goods
+# (chapters 25-97); the EU-UK TCA covers all chapters.
+PREFERENCES = {
+    ("EU", "TR"): 25, ("TR", "EU"): 25, ("GB", "TR"): 25, ("TR", "GB"): 25,
+    ("EU", "GB"): 1, ("GB", "EU"): 1,
+}
+
+EU_MEMBERS = {
+    "at": "austria", "be": "belgium", "bg": "bulgaria", "hr": "croatia", "cy": "cyprus",
+    "cz": "czechia", "dk": "denmark", "ee": "estonia", "fi": "finland", "fr": "france",
+    "de": "germany", "gr": "greece", "hu": "hungary", "ie": "ireland", "it": "italy",
+    "lv": "latvia", "lt": "lithuania", "lu": "luxembourg", "mt": "malta", "nl": "netherlands",
+    "pl": "poland", "pt": "portugal", "ro": "romania", "sk": "slovakia", "si": "slovenia",
+    "es": "spain", "se": "sweden",
+}
+COUNTRY_ALIASES = {
+    "EU": ["eu", "european union", "czech republic", "holland", "deutschland"],
+    "US": ["us", "usa", "united states", "united states of america", "america"],
+    "GB": ["gb", "uk", "united kingdom", "great britain", "england", "scotland", "wales"],
+    "TR": ["tr", "turkey", "türkiye", "turkiye"],
+    "CN": ["cn", "china", "prc", "people's republic of china"],
+}
+
+
+def _chapter_section(chapter: int) -> int:
+    return next(i for i, (lo, hi) in enumerate(SECTIONS) if lo <= chapter <= hi)
+
+
+def _rate(value) -> str:
+    return value if isinstance(value, str) and "=" in value else f"2015-01={float(value):g}"
+
+
+def build() -> list[tuple[str, str]]:
+    rows = []
+    for iso, name in EU_MEMBERS.items():
+        rows += [(f"C|{iso}", "EU"), (f"C|{name}", "EU")]
+    for territory, aliases in COUNTRY_ALIASES.items():
+        rows += [(f"C|{alias}", territory) for alias in aliases]
+    for code, text in {**CHAPTERS, **HEADINGS, **SUBHEADINGS}.items():
+        rows.append((f"H|{code}", text))
+    for territory, rates in SECTION_RATES.items():
+        for chapter in CHAPTERS:
+            rows.append((f"R|{territory}|*|{chapter}", _rate(rates[_chapter_section(int(chapter))])))
+    for (territory, code), value in OVERRIDES.items():
+        rows.append((f"R|{territory}|*|{code}", _rate(value)))
+    for (destination, origin), first in PREFERENCES.items():
+        for chapter in CHAPTERS:
+            if int(chapter) >= first:
+                rows.append((f"R|{destination}|{origin}|{chapter}", _rate(0)))
+    # hs_index bisects on the raw bytes of the key.
+    rows.sort(key=lambda row: row[0].encode("utf-8"))
+    keys = [key for key, _ in rows]
+    assert len(keys) == len(set(keys)), "duplicate keys"
+    return rows
+
+
+def main():
+    rows = build()
+    with open(OUTPUT, "w", encoding="utf-8", newline="\n") as f:
+        f.write("# Generated by build_hs_tariffs.py; edit that file, not this one.\n")
+        for key, value in rows:
+            f.write(f"{key}\t{value}\n")
+    print(f"wrote {len(rows)} rows to {OUTPUT}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
+import asyncio
+import threading
+import time
 import numpy as np
-import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
-import timesfm
-
-from config import TIMESFM_MODEL, logger
+from contextlib import nullcontext
+
+from config import (
+    TARIFF_CACHE_SIZE,
+    TIMESFM_ALLOW_UNVERIFIED_PRECISION,
+    TARIFF_CACHE_TTL_SECONDS,
+    TIMESFM_BACKEND,
+    TIMESFM_CONTEXT_LEN,
+    TIMESFM_HORIZON_LEN,
+    TIMESFM_MODEL,
+    TIMESFM_PRECISION,
+    logger,
+)
 from models import (
     PricePoint,
     RouteOption,
@@ -13,24 +26,137 @@ from models import (
     TariffForecastRequest,
     TariffForecastResult,
 )
+from metrics import (
+    CACHE_REQUESTS,
+    HISTORY_POINTS,
+    INFERENCE_SECONDS,
+    MODEL_LOAD_SECONDS,
+    stage,
+)
+from hs_index import get_index
+from singleflight import SingleFlight
+
+PRECISIONS = ("fp32", "bf16", "int8")
+# Modes whose accuracy and latency bench/precision.py has measured against
+# fp32 on the pinned timesfm version.
+VERIFIED_PRECISIONS = ("fp32",)
+# TimesFM reads the context in 32-step patches.
+PATCH_LEN = 32
+# Smallest forecast move (in the series' own unit) reported as a trend.
+MIN_TREND_DELTA = 0.1
 
 _model = None
+_model_state = "idle"  # idle -> loading -> ready | failed
+_model_lock = threading.Lock()
+
+
+class ModelNotReady(RuntimeError):
+    pass
+
+
+def load_model():
+    global _model, _model_state
+    with _model_lock:
+        if _model is not None:
+            return _model
+        _model_state = "loading"
+        logger.info("Loading TimesFM model: %s (%s)", TIMESFM_MODEL, TIMESFM_PRECISION)
+        start = time.perf_counter()
+        try:
+            _model = build_model(TIMESFM_PRECISION)
+        except Exception:
+            _model_state = "failed"
+            raise
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - start)
+        _model_state = "ready"
+        logger.info("TimesFM model loaded")
+        return _model
 
 
-def _get_model():
-    global _model
-    if _model is None:
-        logger.info("Loading TimesFM model: %s", TIMESFM_MODEL)
-        _model = timesfm.TimesFm(
-            hparams=timesfm.TimesFmHparams(
-                per_core_batch_size=32,
-                horizon_len=128,
-                backend="gpu",
-            ),
-            checkpoint=timesfm.TimesFmCheckpoint(huggingface_repo_id=TIMESFM_MODEL),
+def check_precision(precision: str, allow_unverified: bool = TIMESFM_ALLOW_UNVERIFIED_PRECISION):
+    """Raise ValueError for an unknown mode, or an unverified one unless allowed."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown TIMESFM_PRECISION {precision!r}; expected one of {', '.join(PRECISIONS)}")
+    if precision not in VERIFIED_PRECISIONS and not allow_unverified:
+        raise ValueError(
+            f"TIMESFM_PRECISION={precision} has not been verified against fp32; run "
+            "bench/precision.py on a host with the model, or set TIMESFM_ALLOW_UNVERIFIED_PRECISION=true"
         )
-        logger.info("TimesFM model loaded")
-    return _model
+
+
+def build_model(precision: str = "fp32", allow_unverified: bool = TIMESFM_ALLOW_UNVERIFIED_PRECISION):
+    """Load the TimesFM checkpoint for CPU inference at the given precision.
+
+    int8 swaps every Linear layer for a dynamically quantized one (weights
+    stored as int8, activations quantized per batch); bf16 keeps the weights
+    and runs inference under bf16 autocast (see _inference_context).
+    """
+    check_precision(precision, allow_unverified)
+    # timesfm pulls in torch; importing it here keeps it off the startup
+    # path so /health answers before the model is in memory.
+    import timesfm
+
+    context_len = max(PATCH_LEN, -(-TIMESFM_CONTEXT_LEN // PATCH_LEN) * PATCH_LEN)
+    model = timesfm.TimesFm(
+        hparams=timesfm.TimesFmHparams(
+            per_core_batch_size=32,
+            horizon_len=TIMESFM_HORIZON_LEN,
+            context_len=context_len,
+            backend=TIMESFM_BACKEND,
+        ),
+        checkpoint=timesfm.TimesFmCheckpoint(huggingface_repo_id=TIMESFM_MODEL),
+    )
+    if precision == "int8":
+        import torch
+
+        # A private attribute of TimesFm; check it before swapping it out.
+        if not isinstance(getattr(model, "_model", None), torch.nn.Module):
+            raise RuntimeError("int8 needs TimesFm._model to be the torch module, which this timesfm version lacks")
+        model._model = torch.ao.quantization.quantize_dynamic(
+            model._model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    model.precision = precision
+    return model
+
+
+def model_name(model=None) -> str:
+    precision = getattr(model or _model, "precision", TIMESFM_PRECISION)
+    return "timesfm-2.0-200m" if precision == "fp32" else f"timesfm-2.0-200m-{precision}"
+
+
+def _inference_context(model):
+    if getattr(model, "precision", "fp32") == "bf16":
+        import torch
+
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return nullcontext()
+
+
+def start_model_loading():
+    """Load the model on a background thread; requests use the fallback meanwhile."""
+    if _model_state in ("idle", "failed"):
+        threading.Thread(target=_load_in_background, name="model-loader", daemon=True).start()
+
+
+def _load_in_background():
+    try:
+        load_model()
+    except Exception as exc:
+        logger.error("TimesFM model failed to load: %s", exc)
+
+
+def model_status() -> str:
+    return _model_state
+
+
+def _get_model():
+    if _model is not None:
+        CACHE_REQUESTS.labels("model", "hit").inc()
+        return _model
+    CACHE_REQUESTS.labels("model", "miss").inc()
+    if _model_state == "loading":
+        raise ModelNotReady("TimesFM model is still loading")
+    return load_model()
 
 
 # Freight route baseline data: (origin_keyword, dest_keyword) -> base price range
@@ -88,22 +214,26 @@ def _generate_synthetic_history(
 
 
 def _run_timesfm_forecast(
-    history: list[float], horizon: int
+    history: list[float], horizon: int, model=None
 ) -> tuple[list[float], list[float], list[float]]:
-    model = _get_model()
+    model = model or _get_model()
+    import timesfm
 
-    input_array = np.array([history], dtype=np.float32)
+    # Older points would be cut at context_len by the model anyway; trimming
+    # here keeps the padded input (and the attention cost) small.
+    input_array = np.array([history[-TIMESFM_CONTEXT_LEN:]], dtype=np.float32)
 
     forecast_config = timesfm.ForecastConfig(
         num_jobs=1,
         quantiles=[0.1, 0.5, 0.9],
     )
 
-    point_forecast, quantile_forecast = model.forecast(
-        inputs=input_array,
-        freq=[0],
-        forecast_config=forecast_config,
-    )
+    with _inference_context(model):
+        point_forecast, quantile_forecast = model.forecast(
+            inputs=input_array,
+            freq=[0],
+            forecast_config=forecast_config,
+        )
 
     points = point_forecast[0][:horizon].tolist()
 
@@ -120,13 +250,16 @@ def _run_timesfm_forecast(
 
 
 def _determine_trend(history: list[float], forecast: list[float]) -> str:
-    hist_avg = np.mean(history[-3:])
-    fore_avg = np.mean(forecast[:3])
-    diff_pct = (fore_avg - hist_avg) / hist_avg * 100
-
-    if diff_pct < -3:
+    hist_avg = float(np.mean(history[-3:]))
+    fore_avg = float(np.mean(forecast[:3]))
+    # A 3% move, but never less than MIN_TREND_DELTA in absolute terms, so
+    # a 0% tariff with model noise around it reads as stable.
+    threshold = max(abs(hist_avg) * 0.03, MIN_TREND_DELTA)
+    diff = fore_avg - hist_avg
+
+    if diff < -threshold:
         return "down"
-    elif diff_pct > 3:
+    elif diff > threshold:
         return "up"
     return "stable"
 
@@ -185,27 +318,38 @@ def _generate_insight(trend: str, confidence: float, forecast_prices: list[float
 
 
 async def forecast_freight(req: ForecastRequest) -> ForecastResult:
-    base_lo, base_hi = _get_route_baseline(req.origin, req.destination)
+    with stage("history"):
+        base_lo, base_hi = _get_route_baseline(req.origin, req.destination)
 
-    if req.historical_prices and len(req.historical_prices) >= 6:
-        historical = req.historical_prices
-    else:
-        historical = _generate_synthetic_history(base_lo, base_hi, months=12)
+        if req.historical_prices and len(req.historical_prices) >= 6:
+            historical = req.historical_prices
+        else:
+            historical = _generate_synthetic_history(base_lo, base_hi, months=12)
 
-    history_values = [p.price for p in historical]
+        history_values = [p.price for p in historical]
+    HISTORY_POINTS.labels("freight").observe(len(history_values))
+    horizon = req.horizon
 
+    start = time.perf_counter()
     try:
-        points, lowers, uppers = _run_timesfm_forecast(history_values, req.horizon)
-        model_name = "timesfm-2.0-200m"
+        with stage("model"):
+            # Off the event loop, so other requests (and coalesced
+            # duplicates of this one) are served while the model runs.
+            points, lowers, uppers = await asyncio.to_thread(
+                _run_timesfm_forecast, history_values, horizon
+            )
+        model_used = model_name()
     except Exception as exc:
         logger.error("TimesFM forecast failed, using fallback: %s", exc)
-        last_val = history_values[-1]
-        drift = (history_values[-1] - history_values[-3]) / 2
-        points = [last_val + drift * (i + 1) + np.random.normal(0, 20) for i in range(req.horizon)]
-        std = np.std(history_values) * 0.5
-        lowers = [p - std for p in points]
-        uppers = [p + std for p in points]
-        model_name = "linear-fallback"
+        with stage("fallback"):
+            last_val = history_values[-1]
+            drift = (history_values[-1] - history_values[-3]) / 2
+            points = [last_val + drift * (i + 1) + np.random.normal(0, 20) for i in range(horizon)]
+            std = np.std(history_values) * 0.5
+            lowers = [p - std for p in points]
+            uppers = [p + std for p in points]
+        model_used = "linear-fallback"
+    INFERENCE_SECONDS.labels("freight", model_used).observe(time.perf_counter() - start)
 
     now = datetime.now()
     forecast_data = []
@@ -232,30 +376,103 @@ async def forecast_freight(req: ForecastRequest) -> ForecastResult:
         historical_data=historical,
         forecast_data=forecast_data,
         optimized_routes=routes,
-        model_used=model_name,
+        model_used=model_used,
         insight=insight,
     )
 
 
-async def forecast_tariff(req: TariffForecastRequest) -> TariffForecastResult:
-    if req.historical_rates and len(req.historical_rates) >= 6:
-        historical = req.historical_rates
-    else:
-        historical = _generate_synthetic_history(3.0, 12.0, months=24)
+class _TTLCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
 
-    history_values = [p.price for p in historical]
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
 
+
+# Tariff forecasts from index baselines, keyed by the entry the requested code
+# resolved to: 8481.80.10 and 8481.80.99 entering the EU share one run.
+_tariff_forecasts = _TTLCache(TARIFF_CACHE_SIZE, TARIFF_CACHE_TTL_SECONDS)
+_baseline_runs = SingleFlight("tariff_baseline")
+
+
+async def _forecast_tariff_series(history_values: list[float], horizon: int):
+    start = time.perf_counter()
     try:
-        points, lowers, uppers = _run_timesfm_forecast(history_values, req.horizon)
-        model_name = "timesfm-2.0-200m"
+        with stage("model"):
+            # Off the event loop, so other requests (and coalesced
+            # duplicates of this one) are served while the model runs.
+            points, lowers, uppers = await asyncio.to_thread(
+                _run_timesfm_forecast, history_values, horizon
+            )
+        model_used = model_name()
     except Exception as exc:
         logger.error("TimesFM tariff forecast failed: %s", exc)
-        last_val = history_values[-1]
-        points = [last_val + np.random.normal(0, 0.3) for _ in range(req.horizon)]
-        std = np.std(history_values) * 0.3
-        lowers = [p - std for p in points]
-        uppers = [p + std for p in points]
-        model_name = "linear-fallback"
+        with stage("fallback"):
+            last_val = history_values[-1]
+            points = [last_val + np.random.normal(0, 0.3) for _ in range(horizon)]
+            std = np.std(history_values) * 0.3
+            lowers = [p - std for p in points]
+            uppers = [p + std for p in points]
+        model_used = "linear-fallback"
+    INFERENCE_SECONDS.labels("tariff", model_used).observe(time.perf_counter() - start)
+    return points, lowers, uppers, model_used
+
+
+async def _forecast_baseline(baseline, history_values: list[float], last_month: str, horizon: int):
+    key = (*baseline.key, last_month, horizon)
+    cached = _tariff_forecasts.get(key)
+    if cached is not None:
+        CACHE_REQUESTS.labels("tariff_forecast", "hit").inc()
+        return cached
+    CACHE_REQUESTS.labels("tariff_forecast", "miss").inc()
+    forecast = await _baseline_runs.do(key, lambda: _forecast_tariff_series(history_values, horizon))
+    if forecast[3] != "linear-fallback":
+        _tariff_forecasts.set(key, forecast)
+    return forecast
+
+
+async def forecast_tariff(req: TariffForecastRequest) -> TariffForecastResult:
+    baseline = None
+    with stage("history"):
+        if req.historical_rates and len(req.historical_rates) >= 6:
+            historical = req.historical_rates
+            source = "history"
+        else:
+            index = get_index()
+            baseline = index.baseline(req.hs_code, req.origin_country, req.destination_country) if index else None
+            if baseline:
+                historical = [PricePoint(date=date, price=rate) for date, rate in baseline.series(24)]
+                source = "index"
+            else:
+                historical = _generate_synthetic_history(3.0, 12.0, months=24)
+                source = "synthetic"
+
+        history_values = [p.price for p in historical]
+    HISTORY_POINTS.labels("tariff").observe(len(history_values))
+    horizon = req.horizon
+
+    if baseline:
+        points, lowers, uppers, model_used = await _forecast_baseline(
+            baseline, history_values, historical[-1].date, horizon
+        )
+    else:
+        points, lowers, uppers, model_used = await _forecast_tariff_series(history_values, horizon)
 
     now = datetime.now()
     forecast_data = []
@@ -273,19 +490,33 @@ async def forecast_tariff(req: TariffForecastRequest) -> TariffForecastResult:
     trend = _determine_trend(history_values, points)
     confidence = min(92, 65 + len(historical) * 1.0)
 
+    if baseline:
+        if baseline.origin == baseline.destination:
+            scope = "duty-free internal"
+        else:
+            scope = "MFN" if baseline.origin == "*" else f"preferential ({baseline.origin})"
+        basis = f"Baseline: {baseline.destination} {scope} rate for HS {baseline.hs_code}"
+        basis += f" ({baseline.description}). " if baseline.description else ". "
+    elif source == "synthetic":
+        basis = "No tariff data for this code and route; baseline is illustrative. "
+    else:
+        basis = ""
     insight = (
         f"Tariff forecast for HS {req.hs_code} ({req.origin_country} -> {req.destination_country}): "
         f"{'Rates expected to decrease' if trend == 'down' else 'Rates expected to increase' if trend == 'up' else 'Rates stable'}. "
         f"Current rate: {history_values[-1]:.1f}%. "
+        f"{basis}"
         f"Model confidence: {confidence:.0f}%."
     )
 
     return TariffForecastResult(
         hs_code=req.hs_code,
+        matched_hs_code=baseline.hs_code if baseline else None,
+        baseline_source=source,
         trend=trend,
         confidence=round(confidence, 1),
         current_rate=round(history_values[-1], 2),
         forecast_data=forecast_data,
-        model_used=model_name,
+        model_used=model_used,
         insight=insight,
     )
@@ -0,0 +1,67 @@
+"""Multi-worker deployment: gunicorn -c gunicorn.conf.py main:app
+
+The app and the TimesFM checkpoint are loaded once in the master process and
+workers are forked from it, so every worker shares the same weight pages
+copy-on-write instead of holding its own copy of the model. If the master
+cannot load the model, gunicorn exits rather than have every worker load a
+private copy. With PRELOAD_MODEL=false each worker loads its own on first use.
+"""
+import gc
+import os
+import shutil
+
+from config import PORT, PRELOAD_MODEL, TORCH_THREADS, WORKERS
+
+# Must be set before prometheus_client is imported by the app below.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/loxtr-forecast-metrics")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = f"0.0.0.0:{PORT}"
+workers = WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Model inference holds a worker for seconds; don't let the arbiter kill it.
+timeout = 120
+graceful_timeout = 30
+
+
+def when_ready(server):
+    import hs_index
+
+    hs_index.get_index()
+    if PRELOAD_MODEL:
+        # A process forked while OpenMP/MKL pool threads exist can deadlock
+        # in its first parallel op, so the master loads single-threaded and
+        # post_fork sizes each worker's pool.
+        os.environ["OMP_NUM_THREADS"] = "1"
+        os.environ["MKL_NUM_THREADS"] = "1"
+        import engine
+
+        try:
+            import torch
+
+            torch.set_num_threads(1)
+            torch.set_num_interop_threads(1)
+            engine.load_model()
+        except Exception as exc:
+            # gunicorn exits with this message instead of starting workers.
+            raise RuntimeError(f"TimesFM model failed to load in master: {exc}") from exc
+    # Move everything allocated so far into the permanent generation so the
+    # workers' garbage collector never writes to (and so copies) those pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import sys
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        threads = TORCH_THREADS or max(1, (os.cpu_count() or 1) // max(1, WORKERS))
+        torch.set_num_threads(threads)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,182 @@
+import bisect
+import mmap
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from config import HS_INDEX_PATH, logger
+
+# HS codes are matched on these prefix lengths, most specific first:
+# national tariff line, subheading, heading, chapter.
+CODE_LEVELS = (8, 6, 4, 2)
+NON_DIGITS = re.compile(r"\D")
+# Start of the rate history in the data file; earlier months take the first rate.
+FIRST_MONTH = "2015-01"
+
+
+@dataclass(frozen=True)
+class TariffBaseline:
+    hs_code: str  # the code the rate was found under, maybe a parent
+    description: str | None
+    destination: str
+    origin: str  # origin territory for a preference, "*" for MFN, destination if internal
+    steps: tuple[tuple[str, float], ...]  # (YYYY-MM, rate) in force from that month
+
+    @property
+    def key(self) -> tuple:
+        """Identical for every requested code that falls back to this entry."""
+        return self.destination, self.origin, self.hs_code
+
+    def rate_at(self, month: str) -> float:
+        rate = self.steps[0][1]
+        for since, value in self.steps:
+            if since > month:
+                break
+            rate = value
+        return rate
+
+    def series(self, months: int = 24, now: datetime | None = None) -> list[tuple[str, float]]:
+        """Monthly (YYYY-MM, rate) points ending last month."""
+        now = now or datetime.now()
+        dates = [(now - timedelta(days=30 * i)).strftime("%Y-%m") for i in range(months, 0, -1)]
+        return [(date, self.rate_at(date)) for date in dates]
+
+
+def normalize_hs_code(hs_code: str) -> str:
+    """'8481.80.99.00' -> '84818099'; national lines past 8 digits fall back."""
+    return NON_DIGITS.sub("", hs_code)[:8]
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _parse_steps(value: str) -> tuple[tuple[str, float], ...]:
+    steps = []
+    for step in value.split(";"):
+        since, rate = step.split("=")
+        steps.append((since, float(rate)))
+    return tuple(steps)
+
+
+class HSIndex:
+    """HS-code descriptions and baseline tariff rates from a sorted file.
+
+    The file holds one "key<TAB>value" line per entry, sorted by key bytes:
+    C|<country alias> -> tariff territory, H|<code> -> description and
+    R|<destination>|<origin or *>|<code> -> rate steps. It is memory-mapped,
+    so the only heap cost is an array of line offsets, and forked workers
+    share its pages; lookups bisect the offsets. Sorting on the code makes
+    the file a flattened prefix trie: a missing 8-digit code falls back to
+    its 6-, 4- and 2-digit parents.
+    """
+
+    def __init__(self, path: str = HS_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = array("I")
+        previous = b""
+        pos = 0
+        size = len(self._mm)
+        while pos < size:
+            end = self._mm.find(b"\n", pos)
+            end = size if end == -1 else end
+            if self._mm[pos:pos + 1] not in (b"#", b"\n"):
+                key = self._mm[pos:self._mm.find(b"\t", pos, end)]
+                if key <= previous:
+                    raise ValueError(f"{path} is not sorted at {key!r}; regenerate it")
+                previous = key
+                self._offsets.append(pos)
+            pos = end + 1
+
+    def _key_at(self, offset: int) -> bytes:
+        return self._mm[offset:self._mm.find(b"\t", offset)]
+
+    def _get(self, key: str) -> str | None:
+        raw = key.encode("utf-8")
+        i = bisect.bisect_left(self._offsets, raw, key=self._key_at)
+        if i == len(self._offsets) or self._key_at(self._offsets[i]) != raw:
+            return None
+        start = self._offsets[i] + len(raw) + 1
+        end = self._mm.find(b"\n", start)
+        return self._mm[start:end if end != -1 else len(self._mm)].decode("utf-8")
+
+    def territory(self, country: str) -> str | None:
+        """Tariff territory for a country name or ISO code ('Germany' -> 'EU')."""
+        return self._get(f"C|{_fold(country)}")
+
+    def describe(self, hs_code: str) -> tuple[str, str] | None:
+        """(matched code, description) for the code or its nearest parent."""
+        code = normalize_hs_code(hs_code)
+        for level in CODE_LEVELS:
+            if len(code) >= level:
+                text = self._get(f"H|{code[:level]}")
+                if text is not None:
+                    return code[:level], text
+        return None
+
+    def baseline(self, hs_code: str, origin_country: str, destination_country: str) -> TariffBaseline | None:
+        """Rate steps for goods from origin entering destination.
+
+        A preference for the origin at any code level beats the MFN rate;
+        within each, the most specific code wins. Trade inside one territory
+        (domestic, or within the EU) pays no duty. None when the code is not
+        an HS code or the destination has no rates in the index.
+        """
+        code = normalize_hs_code(hs_code)
+        destination = self.territory(destination_country)
+        if len(code) < 2 or destination is None:
+            return None
+        origin = self.territory(origin_country)
+        if origin == destination:
+            described = self.describe(code)
+            return TariffBaseline(
+                hs_code=described[0] if described else code,
+                description=described[1] if described else None,
+                destination=destination,
+                origin=origin,
+                steps=((FIRST_MONTH, 0.0),),
+            )
+        for origin_key in ((origin, "*") if origin else ("*",)):
+            for level in CODE_LEVELS:
+                if len(code) < level:
+                    continue
+                value = self._get(f"R|{destination}|{origin_key}|{code[:level]}")
+                if value is not None:
+                    described = self.describe(code[:level])
+                    return TariffBaseline(
+                        hs_code=code[:level],
+                        description=described[1] if described else None,
+                        destination=destination,
+                        origin=origin_key,
+                        steps=_parse_steps(value),
+                    )
+        return None
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+_index: HSIndex | None = None
+_index_failed = False
+_index_lock = threading.Lock()
+
+
+def get_index() -> HSIndex | None:
+    """The process-wide index, loaded on first use. None if the data file is
+    missing or corrupt, in which case callers fall back to synthetic data."""
+    global _index, _index_failed
+    if _index is not None or _index_failed:
+        return _index
+    with _index_lock:
+        if _index is None and not _index_failed:
+            try:
+                _index = HSIndex()
+                logger.info("Loaded HS index: %d entries from %s", len(_index), HS_INDEX_PATH)
+            except (OSError, ValueError) as exc:
+                _index_failed = True
+                logger.error("HS index unavailable, tariffs fall back to synthetic history: %s", exc)
+    return _index
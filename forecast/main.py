@@ -1,15 +1,26 @@
-from fastapi import FastAPI, HTTPException, Security, Depends
+import time
+
+from fastapi import FastAPI, HTTPException, Security, Depends, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
 
-from config import FORECAST_API_KEY, PORT, ALLOWED_ORIGINS, logger
+from config import FORECAST_API_KEY, PORT, ALLOWED_ORIGINS, PRELOAD_MODEL, TIMESFM_PRECISION, logger
 from models import (
     ForecastRequest,
     ForecastResult,
     TariffForecastRequest,
     TariffForecastResult,
 )
-from engine import forecast_freight, forecast_tariff
+from responses import ResponseFormat, render_forecast
+from engine import check_precision, forecast_freight, forecast_tariff, model_status, start_model_loading
+from hs_index import get_index
+import metrics
+import profiling
+from singleflight import SingleFlight, request_key
+
+# Dashboards opening the same lane at once share one model run.
+forecasts = SingleFlight("forecast")
 
 app = FastAPI(
     title="LOXTR Forecast Service",
@@ -25,6 +36,7 @@ app.add_middleware(
 )
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
 
 async def verify_api_key(key: str | None = Security(api_key_header)):
@@ -35,29 +47,93 @@ async def verify_api_key(key: str | None = Security(api_key_header)):
     return True
 
 
+async def verify_admin_key(key: str | None = Security(admin_key_header)):
+    if not profiling.is_admin(key):
+        raise HTTPException(status_code=403, detail="Admin key required")
+    return True
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    return await profiling.run_request(request, call_next)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        metrics.REQUEST_SECONDS.labels(endpoint, str(status)).observe(
+            time.perf_counter() - start
+        )
+
+
+@app.on_event("startup")
+async def preload_model():
+    # An unverified or unknown precision stops startup instead of quietly
+    # serving the fallback forecast.
+    check_precision(TIMESFM_PRECISION)
+    get_index()
+    if PRELOAD_MODEL:
+        start_model_loading()
+
+
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": "loxtr-forecast"}
+    return {"status": "ok", "service": "loxtr-forecast", "model": model_status()}
+
+
+@app.get("/metrics")
+async def metrics_endpoint(_=Depends(verify_api_key)):
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/debug/slow-requests")
+async def slow_requests_endpoint(_=Depends(verify_admin_key)):
+    return profiling.slow_requests()
+
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def profile_endpoint(profile_id: str, _=Depends(verify_admin_key)):
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
 
 
 @app.post("/forecast/freight", response_model=ForecastResult)
 async def freight_forecast_endpoint(
-    req: ForecastRequest, _=Depends(verify_api_key)
+    req: ForecastRequest,
+    format: ResponseFormat = "rows",
+    include_history: bool = True,
+    _=Depends(verify_api_key),
 ):
     logger.info("Freight forecast: %s -> %s, horizon=%d", req.origin, req.destination, req.horizon)
-    result = await forecast_freight(req)
+    key = request_key("freight", req, casefold=("origin", "destination"))
+    result = await forecasts.do(key, lambda: forecast_freight(req))
     logger.info("Forecast done: trend=%s, confidence=%.1f, model=%s", result.trend, result.confidence, result.model_used)
-    return result
+    return render_forecast(result, format, include_history)
 
 
 @app.post("/forecast/tariff", response_model=TariffForecastResult)
 async def tariff_forecast_endpoint(
-    req: TariffForecastRequest, _=Depends(verify_api_key)
+    req: TariffForecastRequest,
+    format: ResponseFormat = "rows",
+    _=Depends(verify_api_key),
 ):
     logger.info("Tariff forecast: HS %s, %s -> %s", req.hs_code, req.origin_country, req.destination_country)
-    result = await forecast_tariff(req)
+    # The code and both countries are echoed in the result, so none are folded.
+    key = request_key("tariff", req)
+    result = await forecasts.do(key, lambda: forecast_tariff(req))
     logger.info("Tariff forecast done: trend=%s", result.trend)
-    return result
+    return render_forecast(result, format)
 
 
 if __name__ == "__main__":
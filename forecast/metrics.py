@@ -0,0 +1,86 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_SECONDS = Histogram(
+    "forecast_request_seconds",
+    "HTTP request latency by endpoint",
+    ["endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "forecast_stage_seconds",
+    "Time spent in each forecast stage",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+INFERENCE_SECONDS = Histogram(
+    "forecast_inference_seconds",
+    "Forecast computation time by kind and the model that produced it",
+    ["kind", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "forecast_model_load_seconds",
+    "TimesFM checkpoint load time",
+    buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+HISTORY_POINTS = Histogram(
+    "forecast_history_points",
+    "Length of the history series fed to the model",
+    ["kind"],
+    buckets=(6, 12, 24, 36, 60, 120, 256, 512),
+)
+CACHE_REQUESTS = Counter(
+    "forecast_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+_stage_listeners = []
+
+
+def add_stage_listener(listener):
+    """Register listener(stage, seconds), called after every timed stage."""
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    if listener in _stage_listeners:
+        _stage_listeners.remove(listener)
+
+
+def record_stage(name: str, seconds: float):
+    STAGE_SECONDS.labels(name).observe(seconds)
+    for listener in _stage_listeners:
+        listener(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def render() -> tuple[bytes, str]:
+    # Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR;
+    # whichever worker serves /metrics aggregates all of them.
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
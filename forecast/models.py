@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from config import TIMESFM_HORIZON_LEN
 
 
 class PricePoint(BaseModel):
@@ -21,14 +23,16 @@ class RouteOption(BaseModel):
 class ForecastRequest(BaseModel):
     origin: str
     destination: str
-    horizon: int = 6
+    # The model is built for TIMESFM_HORIZON_LEN steps; a longer horizon is
+    # a 422 rather than a silently shorter forecast.
+    horizon: int = Field(6, ge=1, le=TIMESFM_HORIZON_LEN)
     historical_prices: list[PricePoint] | None = None
 
 
 class ForecastResult(BaseModel):
     trend: str
     confidence: float
-    historical_data: list[PricePoint]
+    historical_data: list[PricePoint] | None = None  # omitted when include_history=false
     forecast_data: list[PricePoint]
     optimized_routes: list[RouteOption]
     model_used: str = "timesfm-2.0-200m"
@@ -39,12 +43,14 @@ class TariffForecastRequest(BaseModel):
     hs_code: str
     origin_country: str
     destination_country: str
-    horizon: int = 12
+    horizon: int = Field(12, ge=1, le=TIMESFM_HORIZON_LEN)
     historical_rates: list[PricePoint] | None = None
 
 
 class TariffForecastResult(BaseModel):
     hs_code: str
+    matched_hs_code: str | None = None
+    baseline_source: str = "synthetic"  # history, index or synthetic
     trend: str
     confidence: float
     current_rate: float
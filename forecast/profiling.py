@@ -0,0 +1,197 @@
+# Vendored from shared/profiling.py by shared/sync.py; edit that file, not this copy.
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from config import (
+    ADMIN_API_KEY,
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_KEEP,
+    PROFILE_SAMPLE_RATE,
+    SLOW_LOG_SIZE,
+    SLOW_REQUEST_SECONDS,
+    logger,
+)
+import metrics
+
+MAX_STACK_DEPTH = 64
+
+_request_stages: ContextVar[list | None] = ContextVar("request_stages", default=None)
+_slow_requests: deque = deque(maxlen=SLOW_LOG_SIZE)
+# Only one profile runs at a time so the sampler's cost stays bounded.
+_profile_lock = threading.Lock()
+# POST requests in flight, and how many ran alongside the current profile.
+# Both are only touched on the event loop thread.
+_in_flight = 0
+_overlapping = 0
+
+
+class SamplingProfiler:
+    """Samples every thread's stack from a background thread.
+
+    Profiles are process-wide: stacks of other requests served while it runs
+    (on the event loop or in worker threads) land in the same profile, so
+    run_request records how many overlapped it. The result is in
+    collapsed-stack format ("frame;frame;frame count"), which flamegraph.pl,
+    speedscope and inferno read directly.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def _record_stage(name: str, seconds: float):
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+metrics.add_stage_listener(_record_stage)
+
+
+def is_admin(key: str | None) -> bool:
+    return bool(ADMIN_API_KEY) and key is not None and hmac.compare_digest(key, ADMIN_API_KEY)
+
+
+def _profile_requested(request) -> bool:
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile")
+    if flag not in ("1", "true"):
+        return False
+    return is_admin(request.headers.get("X-Admin-Key"))
+
+
+def _save_profile(profile_id: str, profiler: SamplingProfiler):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.folded"), "w") as f:
+        f.write(profiler.collapsed())
+
+    profiles = sorted(
+        (e for e in os.scandir(PROFILE_DIR) if e.name.endswith(".folded")),
+        key=lambda e: e.stat().st_mtime,
+    )
+    for entry in profiles[:-PROFILE_KEEP]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def load_profile(profile_id: str) -> str | None:
+    # Profile ids are uuid4 hex; anything else can't name a file we wrote.
+    if not profile_id.isalnum():
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def slow_requests() -> list[dict]:
+    return list(reversed(_slow_requests))
+
+
+async def run_request(request, call_next):
+    """Time a request stage by stage, profiling it when asked or sampled."""
+    if request.method != "POST":
+        return await call_next(request)
+
+    global _in_flight, _overlapping
+    if _profile_lock.locked():
+        _overlapping += 1
+    profiler = None
+    # PROFILE_KEEP=0 keeps no profiles, so there is no point taking one.
+    wanted = PROFILE_KEEP > 0 and (
+        _profile_requested(request) or random.random() < PROFILE_SAMPLE_RATE
+    )
+    if wanted and _profile_lock.acquire(blocking=False):
+        _overlapping = _in_flight
+        profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000)
+        profiler.start()
+    _in_flight += 1
+
+    stages: list = []
+    token = _request_stages.set(stages)
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        duration = time.perf_counter() - start
+        _in_flight -= 1
+        _request_stages.reset(token)
+        profile_id = None
+        overlapping = None
+        if profiler is not None:
+            profiler.stop()
+            overlapping = _overlapping
+            _profile_lock.release()
+            profile_id = uuid.uuid4().hex
+            try:
+                _save_profile(profile_id, profiler)
+            except OSError as exc:
+                logger.warning("Could not store profile %s: %s", profile_id, exc)
+                profile_id = None
+
+        if duration >= SLOW_REQUEST_SECONDS or profile_id:
+            breakdown: dict[str, float] = {}
+            for name, seconds in stages:
+                breakdown[name] = breakdown.get(name, 0.0) + seconds
+            _slow_requests.append({
+                "path": request.url.path,
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "duration_s": round(duration, 4),
+                "stages_s": {k: round(v, 4) for k, v in breakdown.items()},
+                "stage_counts": dict(Counter(name for name, _ in stages)),
+                "profile_id": profile_id,
+                "profile_overlapping_requests": overlapping,
+            })
+            if duration >= SLOW_REQUEST_SECONDS:
+                logger.warning("Slow request %s took %.2fs", request.url.path, duration)
+
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
@@ -0,0 +1,45 @@
+from typing import Literal
+
+import orjson
+from fastapi import Response
+
+from models import PricePoint
+
+ResponseFormat = Literal["rows", "columnar"]
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def columns(points: list[PricePoint]) -> dict[str, list]:
+    """Parallel arrays instead of one object per point."""
+    return {
+        "date": [p.date for p in points],
+        "price": [p.price for p in points],
+        "lower": [p.lower for p in points],
+        "upper": [p.upper for p in points],
+    }
+
+
+def render_forecast(result, format: ResponseFormat = "rows", include_history: bool = True) -> Response:
+    """Serialize a forecast result without re-validating it.
+
+    "rows" keeps the response_model shape, serialized by pydantic-core.
+    "columnar" turns every PricePoint list into parallel arrays and is
+    encoded with orjson. Either way include_history=False drops the echoed
+    historical_data.
+    """
+    exclude = None if include_history else {"historical_data"}
+    if format == "rows":
+        return json_response(result.model_dump_json(exclude=exclude).encode())
+
+    series = {
+        name: columns(getattr(result, name))
+        for name in ("historical_data", "forecast_data")
+        if hasattr(result, name) and (include_history or name != "historical_data")
+    }
+    body = result.model_dump(exclude=set(series) | (exclude or set()))
+    body.update(series)
+    body["format"] = "columnar"
+    return json_response(orjson.dumps(body))
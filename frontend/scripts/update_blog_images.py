@@ -1,32 +1,208 @@
-import re
+import argparse
 import os
+import re
+import sys
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'src', 'data', 'blog-content.ts')
+IMAGE_TEMPLATE = '/images/blog/{slug}.jpg'
+
+# The file is tokenized line by line, so only one post is ever held in
+# memory and every pattern below is matched at a fixed position.
+# In code, a `slug:`/`image:` property with a plain string value is matched
+# whole; otherwise we only care about brackets, quotes and comments.
+CODE_TOKEN = re.compile(
+    r"""(?P<prop>\b(?P<key>slug|image)\s*:\s*(?P<q>['"])(?P<value>(?:[^'"\\\n]|\\.)*)(?P=q))"""
+    r"""|(?P<tok>//|/\*|\$\{|[{}\[\]()'"`])"""
+)
+STRING_END = {
+    "'": re.compile(r"\\.|'", re.S),
+    '"': re.compile(r'\\.|"', re.S),
+}
+TEMPLATE_TOKEN = re.compile(r"\\.|`|\$\{", re.S)
+COMMENT_END = re.compile(r"\*/")
+OPENERS = {'{': '}', '[': ']', '(': ')'}
+CLOSERS = {'}', ']', ')'}
+
+
+class BlogImageUpdater:
+    """Streams a TS source file and points each post's image at its slug.
+
+    A post is an object literal directly inside a top-level array. Its
+    `slug` and `image` properties are only read at the post's own nesting
+    level, so text inside `content` template literals or nested objects can
+    never be mistaken for them, and a post without an image is skipped
+    instead of borrowing the next post's one.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.mode = None  # a quote character or '/*' while inside one
+        self.buffer = []
+        self.entries = []  # slug/image props of the posts being buffered
+        self.changes = []
+
+    def feed(self, line):
+        """Consume one line; returns the lines that are ready to be written."""
+        self._scan(line, len(self.buffer))
+        if not self.entries:
+            return [line]
+        self.buffer.append(line)
+        if self.mode is None and len(self.stack) <= 1:
+            return self._flush()
+        return []
+
+    def finish(self):
+        if self.mode or self.stack:
+            raise ValueError(f"unterminated {self.mode or self.stack[-1]!r} at end of file")
+        return self._flush()
+
+    def _scan(self, line, line_no):
+        pos = 0
+        while pos < len(line):
+            if self.mode == '/*':
+                match = COMMENT_END.search(line, pos)
+                if not match:
+                    return
+                self.mode = None
+                pos = match.end()
+            elif self.mode in STRING_END:
+                pos = self._close_string(line, pos)
+            elif self.stack and self.stack[-1] == '`':
+                match = TEMPLATE_TOKEN.search(line, pos)
+                if not match:
+                    return
+                pos = match.end()
+                if match.group() == '`':
+                    self.stack.pop()
+                elif match.group() == '${':
+                    self.stack.append('${')
+            else:
+                match = CODE_TOKEN.search(line, pos)
+                if not match:
+                    return
+                pos = match.end()
+                if match.group('prop'):
+                    if self.stack == ['[', '{']:
+                        start, end = match.span('value')
+                        self.entries[-1][match.group('key')] = (line_no, start, end, match.group('value'))
+                    continue
+                tok = match.group('tok')
+                if tok == '//':
+                    return
+                if tok == '/*':
+                    self.mode = '/*'
+                elif tok in STRING_END:
+                    self.mode = tok
+                elif tok == '`':
+                    self.stack.append('`')
+                elif tok == '${':
+                    self.stack.append('${')
+                elif tok in OPENERS:
+                    if tok == '{' and self.stack == ['[']:
+                        self.entries.append({})
+                    self.stack.append(tok)
+                elif tok in CLOSERS:
+                    self._close(tok, line_no)
+
+    def _close_string(self, line, pos):
+        pattern = STRING_END[self.mode]
+        while True:
+            match = pattern.search(line, pos)
+            if not match:
+                # An unescaped newline ends a plain string; TS would reject it.
+                raise ValueError(f"unterminated string: {line.strip()[:60]!r}")
+            pos = match.end()
+            if match.group() == self.mode:
+                self.mode = None
+                return pos
+
+    def _close(self, tok, line_no):
+        opener = self.stack.pop() if self.stack else None
+        if opener == '${' and tok == '}':
+            return
+        if opener is None or OPENERS[opener] != tok:
+            raise ValueError(f"unbalanced {tok!r} near buffered line {line_no + 1}")
+
+    def _flush(self):
+        lines = self.buffer
+        for entry in self.entries:
+            self._update_entry(entry, lines)
+        self.buffer = []
+        self.entries = []
+        return lines
+
+    def _update_entry(self, entry, lines):
+        slug = entry.get('slug')
+        image = entry.get('image')
+        if not slug:
+            return
+        if not image:
+            print(f"[!] Post '{slug[3]}' has no image property; skipped.")
+            return
+        wanted = IMAGE_TEMPLATE.format(slug=slug[3])
+        line_no, start, end, current = image
+        if current == wanted:
+            return
+        line = lines[line_no]
+        lines[line_no] = line[:start] + wanted + line[end:]
+        self.changes.append((slug[3], current, wanted))
+
 
-file_path = 'src/data/blog-content.ts'
+def update_file(path, write=True):
+    """Rewrite path in place if any image is stale; returns the changes."""
+    updater = BlogImageUpdater()
+    tmp_path = f"{path}.tmp"
+    out = open(tmp_path, 'w', encoding='utf-8', newline='') if write else None
+    try:
+        with open(path, encoding='utf-8', newline='') as f:
+            for line in f:
+                for ready in updater.feed(line):
+                    if out:
+                        out.write(ready)
+            for ready in updater.finish():
+                if out:
+                    out.write(ready)
+        if out:
+            out.close()
+            if updater.changes:
+                os.replace(tmp_path, path)
+    finally:
+        if out:
+            out.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return updater.changes
 
-# Check if file exists
-if not os.path.exists(file_path):
-    print(f"Error: {file_path} not found.")
-    exit(1)
 
-with open(file_path, 'r') as f:
-    content = f.read()
+def main():
+    parser = argparse.ArgumentParser(description="Point every blog post's image at /images/blog/<slug>.jpg")
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    parser.add_argument('--check', action='store_true', help="exit 1 if any image is stale, without writing")
+    parser.add_argument('--dry-run', action='store_true', help="list the changes without writing")
+    args = parser.parse_args()
 
-# Regex to find slug and replace image.
-# We assume slug appears before image in the object definition.
-# Capture slug value (group 1) and the text between slug and image (group 2).
-pattern = r"(slug:\s*['\"])([^'\"]+)(['\"][\s\S]*?image:\s*)(['\"][^'\"]+['\"])"
+    if not os.path.exists(args.path):
+        print(f"Error: {args.path} not found.")
+        sys.exit(1)
 
-def replacer(match):
-    prefix = match.group(1)
-    slug = match.group(2)
-    middle = match.group(3)
-    # Construct new image path using the slug
-    new_image_path = f'"/images/blog/{slug}.jpg"'
-    return f"{prefix}{slug}{middle}{new_image_path}"
+    try:
+        changes = update_file(args.path, write=not (args.check or args.dry_run))
+    except ValueError as e:
+        print(f"Error: could not parse {args.path}: {e}")
+        sys.exit(2)
 
-new_content = re.sub(pattern, replacer, content)
+    for slug, old, new in changes:
+        print(f"  {slug}: {old} -> {new}")
+    if not changes:
+        print(f"All image paths in {args.path} are up to date.")
+    elif args.check:
+        print(f"{len(changes)} image path(s) are stale in {args.path}")
+        sys.exit(1)
+    elif args.dry_run:
+        print(f"Would update {len(changes)} image path(s) in {args.path}")
+    else:
+        print(f"Successfully updated {len(changes)} image path(s) in {args.path}")
 
-with open(file_path, 'w') as f:
-    f.write(new_content)
 
-print(f"Successfully updated image paths in {file_path}")
+if __name__ == '__main__':
+    main()
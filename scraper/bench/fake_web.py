@@ -0,0 +1,207 @@
+import hashlib
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Every lead gets its own loopback address (127.0.<i // 250>.<i % 250 + 1>) so
+# per-host logic sees distinct companies. Linux routes all of 127.0.0.0/8 to lo.
+SEARCH_HOST = "127.0.0.1"
+
+# Order matters: lead i is served the kind KINDS[i % len(KINDS)].
+KINDS = ["full", "contact", "minimal", "catalog", "slow", "dead", "pdf"]
+HTML = "text/html; charset=utf-8"
+# A few hundred KB of binary that a site serves instead of a homepage.
+PDF_BODY = b"%PDF-1.7\n" + bytes(range(256)) * 1024
+
+COMPANY_WORDS = [
+    "Anadolu", "Nordic", "Baltic", "Atlas", "Delta", "Kuzey", "Marmara",
+    "Rhein", "Iberia", "Aegean", "Orion", "Vega",
+]
+
+
+def company_for(index: int) -> str:
+    word = COMPANY_WORDS[index % len(COMPANY_WORDS)]
+    return f"{word} Industrial {index:05d}"
+
+
+def slug_for(index: int) -> str:
+    return re.sub(r"[^a-z0-9]+", "", company_for(index).lower())
+
+
+def kind_for(index: int) -> str:
+    return KINDS[index % len(KINDS)]
+
+
+def host_for(index: int) -> str:
+    return f"127.0.{index // 250}.{index % 250 + 1}"
+
+
+def index_for(host: str) -> int | None:
+    parts = host.split(".")
+    if len(parts) != 4 or parts[:2] != ["127", "0"]:
+        return None
+    try:
+        return int(parts[2]) * 250 + int(parts[3]) - 1
+    except ValueError:
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _catalog_rows(size_bytes: int) -> str:
+    row = (
+        '    <tr><td>DIN 933 M{n} x {l}</td><td>Art. {n}{l}-ZN</td>'
+        "<td>8.8 zinc plated</td><td>{n}.{l} EUR / 100 pcs</td>"
+        "<td>Pack 0{n} {l}0 {n}{l} 55</td></tr>"
+    )
+    rows = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        line = row.format(n=6 + i % 24, l=10 + i % 190)
+        rows.append(line)
+        total += len(line) + 1
+        i += 1
+    return "\n".join(rows)
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients drop pooled or truncated connections all the time; that is
+        # expected here, not a server fault.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeWeb:
+    """Serves recorded company sites and a Google-style SERP on loopback."""
+
+    def __init__(
+        self,
+        slow_delay: float = 0.5,
+        catalog_bytes: int = 2_000_000,
+        port: int | None = None,
+    ):
+        self.slow_delay = slow_delay
+        self.port = port or _free_port()
+        self.dead_port = _free_port()
+        self._templates: dict[str, str] = {}
+        self._catalog_rows = _catalog_rows(catalog_bytes)
+        self._server = _QuietServer(("", self.port), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def site_url(self, index: int) -> str:
+        if kind_for(index) == "dead":
+            return self.dead_url(index)
+        return f"http://{host_for(index)}:{self.port}/"
+
+    def dead_url(self, index: int) -> str:
+        # Nothing listens on dead_port, so connections are refused immediately.
+        return f"http://{host_for(index)}:{self.dead_port}/"
+
+    def search_template(self) -> str:
+        return f"http://{SEARCH_HOST}:{self.port}/search?q={{query}}&num=20"
+
+    def _template(self, rel_path: str) -> str | None:
+        if rel_path not in self._templates:
+            path = FIXTURES_DIR / rel_path
+            self._templates[rel_path] = path.read_text(encoding="utf-8") if path.is_file() else None
+        return self._templates[rel_path]
+
+    def _render_site(self, index: int, path: str) -> tuple[int, str | bytes, str]:
+        kind = kind_for(index)
+        if kind == "dead":
+            return 503, "<html><body>Service Unavailable</body></html>", HTML
+        if kind == "pdf":
+            return 200, PDF_BODY, "application/pdf"
+        if kind == "slow":
+            time.sleep(self.slow_delay)
+            kind = "full"
+
+        name = path.strip("/") or "index"
+        body = None
+        for candidate in (f"{name}.html", f"{name}/index.html", name):
+            body = self._template(f"sites/{kind}/{candidate}")
+            if body is not None:
+                break
+        if body is None:
+            return 404, "<html><body>Not Found</body></html>", HTML
+
+        body = body.replace("{{company}}", company_for(index))
+        body = body.replace("{{slug}}", slug_for(index))
+        if "{{catalog_rows}}" in body:
+            body = body.replace("{{catalog_rows}}", self._catalog_rows)
+        return 200, body, HTML
+
+    def _render_serp(self, query: str) -> str:
+        item = self._template("serp_item.html")
+        seed = int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:8], 16)
+        items = []
+        for rank in range(20):
+            # A stride coprime to len(KINDS), so one page mixes site kinds.
+            index = (seed + rank * 13) % 10_000
+            items.append(
+                item.replace("{{rank}}", str(rank))
+                .replace("{{url}}", self.site_url(index))
+                .replace("{{company}}", company_for(index))
+            )
+        page = self._template("serp.html")
+        return page.replace("{{query}}", query).replace("{{results}}", "\n".join(items))
+
+    def _handler_class(self):
+        web = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                host = (self.headers.get("Host") or "").split(":")[0]
+                parsed = urlparse(self.path)
+                if host == SEARCH_HOST and parsed.path == "/search":
+                    query = parse_qs(parsed.query).get("q", [""])[0]
+                    status, body, content_type = 200, web._render_serp(query), HTML
+                else:
+                    index = index_for(host)
+                    if index is None:
+                        status, body, content_type = 404, "<html><body>Unknown host</body></html>", HTML
+                    else:
+                        status, body, content_type = web._render_site(index, parsed.path)
+
+                data = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
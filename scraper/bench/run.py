@@ -0,0 +1,183 @@
+"""Offline scraper benchmark.
+
+Run from the scraper directory:
+
+    python -m bench.run --sizes 10,100,1000
+    python -m bench.run --sizes 10000 --discover 3 --json bench_output.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+import discoverer
+import enricher
+import metrics
+from dedup import lead_index
+from models import DiscoverRequest, EnrichRequest
+from timeouts import latency
+from bench.fake_web import FakeWeb, company_for
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def reset(self):
+        self.samples = {}
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        out = {}
+        for stage, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            out[stage] = {
+                "count": len(ordered),
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "total_s": sum(ordered),
+            }
+        return out
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _install(web: FakeWeb, timer: StageTimer):
+    """Point the scraper at the fake web and collect its stage timings."""
+    enricher._guess_website = lambda name, country: web.dead_url(0)
+    discoverer.GOOGLE_SEARCH_TEMPLATE = web.search_template()
+
+    metrics.add_stage_listener(timer.record)
+
+
+async def _bench_enrich(web: FakeWeb, timer: StageTimer, size: int, trace: bool) -> dict:
+    leads = [
+        EnrichRequest(company_name=company_for(i), website=web.site_url(i))
+        for i in range(size)
+    ]
+    timer.reset()
+    # Each size starts cold: no company the last size resolved and no host
+    # timings it learnt.
+    lead_index.clear()
+    latency.clear()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    results = await enricher.enrich_batch(leads)
+    wall = time.perf_counter() - start
+    traced_peak = None
+    if trace:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    alive = sum(1 for r in results if r.website_alive)
+    return {
+        "benchmark": "enrich_batch",
+        "leads": size,
+        "wall_s": wall,
+        "leads_per_s": size / wall if wall else 0.0,
+        "alive": alive,
+        "avg_score": statistics.fmean(r.enrichment_score for r in results) if results else 0.0,
+        "stages": timer.summary(),
+        "peak_rss_mb": _peak_rss_mb(),
+        "traced_peak_mb": traced_peak,
+    }
+
+
+async def _bench_discover(timer: StageTimer, markets: int) -> dict:
+    req = DiscoverRequest(
+        product="industrial valves",
+        target_markets=[f"Market {m}" for m in range(markets)],
+        industry="manufacturing",
+        count=15,
+    )
+    timer.reset()
+    start = time.perf_counter()
+    leads = await discoverer.discover_leads(req)
+    wall = time.perf_counter() - start
+    return {
+        "benchmark": "discover_leads",
+        "markets": markets,
+        "wall_s": wall,
+        "leads": len(leads),
+        "leads_per_s": len(leads) / wall if wall else 0.0,
+        "markets_covered": len({lead.country for lead in leads}),
+        "stages": timer.summary(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _print_report(report: dict):
+    head = f"{report['benchmark']}: {report['leads']} leads in {report['wall_s']:.2f}s"
+    print(f"{head} ({report['leads_per_s']:.1f} leads/s, peak RSS {report['peak_rss_mb']:.0f} MB)")
+    if report.get("markets_covered") is not None:
+        print(f"  leads from {report['markets_covered']} of {report['markets']} markets")
+    if report.get("traced_peak_mb") is not None:
+        print(f"  traced peak allocations: {report['traced_peak_mb']:.1f} MB")
+    for stage, s in report["stages"].items():
+        print(
+            f"  {stage:<12} n={s['count']:<6} p50={s['p50_ms']:8.2f}ms "
+            f"p95={s['p95_ms']:8.2f}ms max={s['max_ms']:8.2f}ms total={s['total_s']:.2f}s"
+        )
+
+
+async def _main(args) -> list[dict]:
+    timer = StageTimer()
+    reports = []
+    with FakeWeb(slow_delay=args.slow_delay, catalog_bytes=args.catalog_kb * 1024) as web:
+        _install(web, timer)
+        for size in args.sizes:
+            report = await _bench_enrich(web, timer, size, args.tracemalloc)
+            _print_report(report)
+            reports.append(report)
+        if args.discover:
+            report = await _bench_discover(timer, args.discover)
+            _print_report(report)
+            reports.append(report)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against a local fake web")
+    parser.add_argument(
+        "--sizes",
+        type=lambda v: [int(x) for x in v.split(",") if x],
+        default=[10, 100, 1000],
+        help="comma separated enrich_batch sizes (default: 10,100,1000)",
+    )
+    parser.add_argument("--discover", type=int, default=0, help="also run discover_leads over N markets")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="seconds the slow sites stall")
+    parser.add_argument("--catalog-kb", type=int, default=2048, help="size of the catalog page body")
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python allocation peak (slower)")
+    parser.add_argument("--json", help="write the reports to this file")
+    args = parser.parse_args()
+
+    for name in ("httpx", "scrapling", "scraper"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    reports = asyncio.run(_main(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
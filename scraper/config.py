@@ -10,3 +10,36 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(me
 SCRAPER_API_KEY = os.getenv("SCRAPER_API_KEY", "")
 PORT = int(os.getenv("PORT", "8100"))
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "15"))
+FETCH_MIN_TIMEOUT = float(os.getenv("FETCH_MIN_TIMEOUT", "2"))
+FETCH_TIMEOUT_MULTIPLIER = float(os.getenv("FETCH_TIMEOUT_MULTIPLIER", "3"))
+FETCH_HEDGE = os.getenv("FETCH_HEDGE", "false").lower() in ("1", "true", "yes")
+FETCH_HEDGE_MIN_DELAY = float(os.getenv("FETCH_HEDGE_MIN_DELAY", "0.5"))
+FETCH_THREADS = int(os.getenv("FETCH_THREADS", "32"))
+LATENCY_SAMPLES = int(os.getenv("LATENCY_SAMPLES", "32"))
+LATENCY_HOSTS = int(os.getenv("LATENCY_HOSTS", "5000"))
+LEAD_DEADLINE_SECONDS = float(os.getenv("LEAD_DEADLINE_SECONDS", "25"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(1024 * 1024)))
+# Empty: send the generated browser headers' own User-Agent.
+FETCH_USER_AGENT = os.getenv("FETCH_USER_AGENT", "")
+# Failed connection attempts retried before a fetch fails; the first retry is
+# immediate, later ones back off 0.5s, 1s, ...
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "1"))
+
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/loxtr-scraper-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "5"))
+SLOW_LOG_SIZE = int(os.getenv("SLOW_LOG_SIZE", "100"))
+
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "4"))
+CRAWL_BUDGET_SECONDS = float(os.getenv("CRAWL_BUDGET_SECONDS", "10"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "2"))
+
+DEDUP_INDEX_SIZE = int(os.getenv("DEDUP_INDEX_SIZE", "50000"))
+DEDUP_TTL_SECONDS = float(os.getenv("DEDUP_TTL_SECONDS", str(6 * 3600)))
+
+DISCOVER_MAX_QUERIES = int(os.getenv("DISCOVER_MAX_QUERIES", "12"))
+DISCOVER_SEARCH_CONCURRENCY = int(os.getenv("DISCOVER_SEARCH_CONCURRENCY", "3"))
@@ -0,0 +1,121 @@
+import asyncio
+import heapq
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from config import CRAWL_BUDGET_SECONDS, CRAWL_CONCURRENCY, CRAWL_MAX_PAGES
+from dedup import registrable_domain
+from fetch import fetch
+from metrics import CRAWL_PAGES
+from timeouts import deadline_scope, remaining
+
+# Lower is fetched first. Contact pages carry emails, phones and the street
+# address; about/team pages the founding year and headcount.
+LINK_PRIORITIES = (
+    (0, ("contact", "kontakt", "iletisim", "contacto", "contatti", "impressum", "imprint", "legal-notice")),
+    (1, ("about", "hakkimizda", "kurumsal", "ueber-uns", "uber-uns", "unternehmen", "company", "who-we-are", "quienes-somos")),
+    (2, ("team", "ekibimiz", "people", "history", "tarihce", "careers", "kariyer")),
+)
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".doc", ".docx", ".xls", ".xlsx")
+
+
+def _normalize(url: str) -> str:
+    return urldefrag(url)[0].rstrip("/")
+
+
+def _link_priority(href: str, text: str) -> int | None:
+    target = f"{href.lower()} {text.lower()}"
+    for priority, hints in LINK_PRIORITIES:
+        if any(hint in target for hint in hints):
+            return priority
+    return None
+
+
+def frontier_links(base_url: str, page) -> list[tuple[int, str]]:
+    """Same-site links worth crawling, as (priority, url)."""
+    site = registrable_domain(base_url)
+    links = []
+    for link in page.css("a[href]"):
+        href = link.attrib.get("href", "").strip()
+        if not href or href.startswith(("mailto:", "tel:", "javascript:", "#")):
+            continue
+        url = urljoin(base_url, href)
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+        if registrable_domain(url) != site:
+            continue
+        priority = _link_priority(parsed.path + "?" + parsed.query, link.text or "")
+        if priority is not None:
+            links.append((priority, url))
+    return links
+
+
+async def crawl_site(
+    base_url: str,
+    home,
+    visit,
+    is_done,
+    max_pages: int = CRAWL_MAX_PAGES,
+    budget: float = CRAWL_BUDGET_SECONDS,
+    concurrency: int = CRAWL_CONCURRENCY,
+) -> int:
+    """Crawl a company site from its parsed home page, best pages first.
+
+    Up to `concurrency` pages are fetched at once, taken from a frontier
+    ordered by LINK_PRIORITIES. Each page is handed to visit(page); crawling
+    stops as soon as is_done() is true, after max_pages fetches, or when the
+    time budget (or the caller's deadline, if sooner) runs out. Returns the
+    number of pages fetched.
+    """
+    left = remaining()
+    if left is not None:
+        budget = min(budget, left)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+    seen = {_normalize(base_url)}
+    frontier: list[tuple[int, int, str]] = []
+    order = 0
+
+    def _push(page, page_url):
+        nonlocal order
+        for priority, url in frontier_links(page_url, page):
+            key = _normalize(url)
+            if key not in seen:
+                seen.add(key)
+                heapq.heappush(frontier, (priority, order, url))
+                order += 1
+
+    async def _fetch(url):
+        return url, await fetch(url)
+
+    _push(home, base_url)
+    pending: set[asyncio.Task] = set()
+    fetched = 0
+    try:
+        while not is_done():
+            while frontier and len(pending) < concurrency and fetched + len(pending) < max_pages:
+                _, _, url = heapq.heappop(frontier)
+                # Tasks copy the context they are created in, so each fetch
+                # is cut to the crawl budget on top of its adaptive timeout.
+                with deadline_scope(deadline - loop.time()):
+                    pending.add(asyncio.create_task(_fetch(url)))
+            left = deadline - loop.time()
+            if not pending or left <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=left, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                fetched += 1
+                url, page = task.result()
+                if page is None:
+                    continue
+                visit(page)
+                _push(page, url)
+    finally:
+        # Fetches run in threads and finish on their own; their pages are
+        # simply dropped.
+        for task in pending:
+            task.cancel()
+        CRAWL_PAGES.observe(fetched)
+    return fetched
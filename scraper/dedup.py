@@ -0,0 +1,222 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from config import DEDUP_INDEX_SIZE, DEDUP_TTL_SECONDS
+from metrics import CACHE_REQUESTS
+
+# Second-level labels under which ccTLDs register names (acme.com.tr,
+# acme.co.uk). Not the full public suffix list, but it covers the markets
+# we search and keeps the service free of another dependency.
+SECOND_LEVEL_LABELS = {"com", "co", "net", "org", "gov", "edu", "ac", "gen", "biz", "ltd", "plc", "web", "or", "ne", "go"}
+# Hosting platforms that give each customer a subdomain. Under these the
+# customer's full host names the company, not the platform's label.
+SHARED_HOST_SUFFIXES = {
+    "wixsite.com", "blogspot.com", "github.io", "myshopify.com", "wordpress.com",
+    "business.site", "weebly.com", "webflow.io", "squarespace.com", "jimdofree.com",
+    "jimdosite.com", "godaddysites.com", "netlify.app", "vercel.app", "herokuapp.com",
+    "tumblr.com", "site123.me", "odoo.com", "ueniweb.com", "wixstudio.com",
+}
+# Email providers that say nothing about which company a mailbox belongs to.
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "hotmail.com", "outlook.com", "live.com",
+    "yahoo.com", "icloud.com", "aol.com", "gmx.de", "gmx.net", "web.de",
+    "yandex.com", "yandex.ru", "mail.ru", "protonmail.com", "proton.me",
+    "hotmail.co.uk", "yahoo.co.uk", "msn.com", "t-online.de", "orange.fr",
+}
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "co", "corp", "corporation",
+    "company", "plc", "gmbh", "ag", "kg", "ohg", "ug", "mbh", "sa", "sas", "sarl",
+    "srl", "spa", "bv", "nv", "oy", "ab", "as", "aps", "sti", "tic", "san", "ve",
+    "anonim", "sirketi", "group", "holding", "the", "and",
+}
+NAME_TOKEN = re.compile(r"[a-z0-9]+")
+# Turkish dotless i and friends don't decompose under NFKD.
+FOLD = str.maketrans({"ı": "i", "ß": "ss", "ø": "o", "æ": "ae", "œ": "oe", "ł": "l", "đ": "d"})
+
+
+def _host(url_or_host: str) -> str:
+    host = url_or_host.strip().lower()
+    if "//" not in host:
+        host = "//" + host
+    host = urlparse(host).hostname or ""
+    return host.rstrip(".")
+
+
+def registrable_domain(url_or_host: str | None) -> str | None:
+    """'https://www.shop.acme.com.tr/x' -> 'acme.com.tr',
+    'www.acme.wixsite.com' -> 'acme.wixsite.com'."""
+    if not url_or_host:
+        return None
+    labels = [l for l in _host(url_or_host).split(".") if l]
+    if len(labels) < 2:
+        return None
+    if labels[-1].isdigit():
+        return ".".join(labels)  # an IP address is its own entity
+    size = 2
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        size = 3
+    elif len(labels) >= 3 and ".".join(labels[-2:]) in SHARED_HOST_SUFFIXES:
+        size = 3
+    return ".".join(labels[-size:])
+
+
+def _is_own_domain(domain: str) -> bool:
+    """False for IP addresses and customer hosts on a shared platform, which
+    have no brand label of their own."""
+    labels = domain.split(".")
+    return not labels[-1].isdigit() and ".".join(labels[-2:]) not in SHARED_HOST_SUFFIXES
+
+
+def domain_key(url_or_host: str | None) -> str | None:
+    """The brand label of a domain, so acme.com and acme.com.tr share a key.
+    IP addresses and shared-platform hosts are keyed on the whole domain."""
+    domain = registrable_domain(url_or_host)
+    if not domain:
+        return None
+    return domain.split(".")[0] if _is_own_domain(domain) else domain
+
+
+def normalize_company(name: str | None) -> str | None:
+    """'ACME Makina San. ve Tic. A.Ş.' -> 'acme makina'."""
+    if not name:
+        return None
+    folded = unicodedata.normalize("NFKD", name.lower().translate(FOLD))
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    # Join dotted abbreviations first so "a.s." and "s.a." become one token.
+    folded = re.sub(r"\b([a-z])\.(?=[a-z]\b\.?)", r"\1", folded)
+    tokens = NAME_TOKEN.findall(folded)
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens) or None
+
+
+def email_domain(email: str | None) -> str | None:
+    if not email or "@" not in email:
+        return None
+    domain = registrable_domain(email.rsplit("@", 1)[1])
+    if not domain or domain in FREE_MAIL_DOMAINS:
+        return None
+    return domain
+
+
+def _country_key(country: str | None) -> str:
+    return " ".join(NAME_TOKEN.findall(country.lower())) if country else ""
+
+
+def _domain_aliases(website=None, emails=(), country=None) -> list[str]:
+    """The exact domains, then their brand labels. A brand label is as weak
+    as a name, so like names it only links leads within one country:
+    acme.de in Germany and acme.com in the US stay apart."""
+    domains = [registrable_domain(website)] + [email_domain(e) for e in emails]
+    domains = list(dict.fromkeys(d for d in domains if d))
+    scope = _country_key(country)
+    brands = [f"b:{scope}:{domain_key(d)}" for d in domains if _is_own_domain(d)]
+    return [f"d:{d}" for d in domains] + list(dict.fromkeys(brands))
+
+
+def _name_aliases(company_name, country=None) -> list[str]:
+    """Name aliases are per country: "Acme GmbH" in Germany and "Acme Inc."
+    in the US are different companies, and a lead without a country only
+    matches others without one."""
+    name = normalize_company(company_name)
+    if not name:
+        return []
+    scope = _country_key(country)
+    compact = name.replace(" ", "")
+    names = [name] if compact == name else [name, compact]
+    return [f"n:{scope}:{n}" for n in names]
+
+
+class _TTLCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LeadIndex:
+    """Resolves company names, websites and email domains to one entity.
+
+    Every alias seen for an entity (its website and company email domains,
+    and within its country their brand labels, its normalized name and the
+    name without spaces) points at the same entity key. The index outlives a
+    single request, so discovery teaches enrichment which website a company
+    uses. Entries expire after the TTL and the least recently used ones are
+    dropped past max_entries.
+    """
+
+    def __init__(self, max_entries: int = DEDUP_INDEX_SIZE, ttl: float = DEDUP_TTL_SECONDS):
+        self._aliases = _TTLCache(max_entries, ttl)
+        self._websites = _TTLCache(max_entries, ttl)
+        self._lock = threading.Lock()
+
+    def resolve(self, company_name=None, website=None, emails=(), country=None) -> str | None:
+        """Return the entity key for these identifiers, linking any new aliases.
+
+        Domains are strong identifiers and names weak ones: a name only
+        resolves to an entity that has no website yet, so two sites whose
+        titles both say "Home" stay separate.
+        """
+        domains = _domain_aliases(website, emails, country)
+        names = _name_aliases(company_name, country)
+        if not domains and not names:
+            return None
+        with self._lock:
+            entity = next(filter(None, map(self._aliases.get, domains)), None)
+            if entity is None:
+                for alias in names:
+                    candidate = self._aliases.get(alias)
+                    if candidate and not (domains and self._websites.get(candidate)):
+                        entity = candidate
+                        break
+            CACHE_REQUESTS.labels("lead_index", "hit" if entity else "miss").inc()
+            entity = entity or (domains + names)[0]
+            for alias in domains:
+                self._aliases.set(alias, entity)
+            for alias in names:
+                if self._aliases.get(alias) in (None, entity):
+                    self._aliases.set(alias, entity)
+            if website and not self._websites.get(entity):
+                self._websites.set(entity, website)
+        return entity
+
+    def clear(self):
+        with self._lock:
+            self._aliases = _TTLCache(self._aliases.max_entries, self._aliases.ttl)
+            self._websites = _TTLCache(self._websites.max_entries, self._websites.ttl)
+
+    def website_for(self, entity: str | None) -> str | None:
+        if not entity:
+            return None
+        with self._lock:
+            return self._websites.get(entity)
+
+    def __len__(self):
+        return len(self._aliases)
+
+
+lead_index = LeadIndex()
@@ -1,11 +1,16 @@
 import re
 import asyncio
+import math
 from urllib.parse import urljoin, urlparse, quote_plus
 
-from scrapling import Fetcher
-from config import logger
+from config import DISCOVER_MAX_QUERIES, DISCOVER_SEARCH_CONCURRENCY, logger
+from dedup import domain_key, lead_index, registrable_domain
+from fetch import fetch
 from models import DiscoverRequest, DiscoveredLead
-from enricher import _extract_emails, _extract_phones, _extract_meta, _try_fetch_page
+from metrics import acquire, stage
+from enricher import _extract_emails, _extract_phones, _extract_meta
+from structured import extract_structured
+from textscan import scan_text
 
 
 TRADE_DIRECTORIES = [
@@ -30,16 +35,46 @@ GOOGLE_SEARCH_TEMPLATE = (
 )
 
 
-def _build_search_queries(req: DiscoverRequest) -> list[str]:
-    queries = []
-    for market in req.target_markets[:3]:
-        queries.append(
-            f'"{req.product}" {req.industry} {market} company supplier manufacturer'
-        )
-        queries.append(
-            f'"{req.product}" exporter importer {market} contact email'
-        )
-    return queries
+# Per market, most productive first. The planner spends the query budget a
+# template at a time across all markets before any market gets a second one.
+QUERY_TEMPLATES = (
+    '"{product}" {industry} {market} company supplier manufacturer',
+    '"{product}" exporter importer {market} contact email',
+)
+
+
+def _markets(req: DiscoverRequest) -> list[str]:
+    seen = set()
+    markets = []
+    for market in req.target_markets:
+        market = " ".join(market.split())
+        if market and market.casefold() not in seen:
+            seen.add(market.casefold())
+            markets.append(market)
+    return markets
+
+
+def _plan_queries(req: DiscoverRequest, budget: int = DISCOVER_MAX_QUERIES) -> dict[str, list[str]]:
+    """Spread up to `budget` search queries across every target market.
+
+    With more markets than budget, the first `budget` markets get one query
+    each and the rest none; that is logged rather than silently dropped.
+    """
+    markets = _markets(req)
+    plan: dict[str, list[str]] = {market: [] for market in markets}
+    spent = 0
+    for template in QUERY_TEMPLATES:
+        for market in markets:
+            if spent >= budget:
+                break
+            plan[market].append(
+                template.format(product=req.product, industry=req.industry, market=market)
+            )
+            spent += 1
+    skipped = [m for m, queries in plan.items() if not queries]
+    if skipped:
+        logger.warning("Query budget %d exhausted; not searching %s", budget, ", ".join(skipped))
+    return {m: queries for m, queries in plan.items() if queries}
 
 
 def _parse_google_results(page) -> list[dict]:
@@ -67,11 +102,11 @@ def _parse_google_results(page) -> list[dict]:
             continue
 
         snippet_el = item.css_first("div[data-sncf], span.st, div.VwiC3b")
-        snippet = snippet_el.text().strip()[:300] if snippet_el else ""
+        snippet = snippet_el.text.strip()[:300] if snippet_el else ""
 
         results.append({
             "url": href,
-            "title": title_el.text().strip(),
+            "title": title_el.text.strip(),
             "snippet": snippet,
             "domain": domain,
         })
@@ -81,25 +116,32 @@ def _parse_google_results(page) -> list[dict]:
 
 async def _scrape_company_page(url: str, company_hint: str, country: str) -> DiscoveredLead | None:
     try:
-        page = await asyncio.to_thread(_try_fetch_page, url)
+        page = await fetch(url)
         if not page:
             return None
 
-        title, description = _extract_meta(page)
-        emails = _extract_emails(page)
-        phones = _extract_phones(page)
-
-        name = company_hint
-        if title:
-            clean_title = re.split(r"[\|\-–—]", title)[0].strip()
-            if clean_title and len(clean_title) > 3:
-                name = clean_title
-
-        products = []
-        keywords_meta = page.css_first('meta[name="keywords"]')
-        if keywords_meta:
-            content = keywords_meta.attrib.get("content", "")
-            products = [k.strip() for k in content.split(",") if k.strip()][:5]
+        with stage("extract"):
+            data = extract_structured(page)
+            title, description = _extract_meta(page)
+            description = description or data.description
+            emails, phones = data.emails, data.phones
+            if not emails or not phones:
+                scanned = scan_text(page, want_emails=not emails, want_phones=not phones)
+                emails = emails or _extract_emails(page, scanned)
+                phones = phones or _extract_phones(page, scanned)
+
+            name = data.name or company_hint
+            if title and not data.name:
+                clean_title = re.split(r"[\|\-–—]", title)[0].strip()
+                if clean_title and len(clean_title) > 3:
+                    name = clean_title
+
+            products = []
+            keywords_meta = page.css_first('meta[name="keywords"]')
+            if keywords_meta:
+                content = keywords_meta.attrib.get("content", "")
+                products = [k.strip() for k in content.split(",") if k.strip()][:5]
+            products = products or data.keywords[:5]
 
         confidence = 30
         if emails:
@@ -116,6 +158,7 @@ async def _scrape_company_page(url: str, company_hint: str, country: str) -> Dis
             website=url,
             website_alive=True,
             country=country,
+            city=data.city,
             email=emails[0] if emails else None,
             phone=phones[0] if phones else None,
             description=description,
@@ -128,47 +171,76 @@ async def _scrape_company_page(url: str, company_hint: str, country: str) -> Dis
         return None
 
 
-async def discover_leads(req: DiscoverRequest) -> list[DiscoveredLead]:
-    queries = _build_search_queries(req)
-    all_search_results = []
+def _merge_round_robin(per_market: list[list[DiscoveredLead]], count: int) -> list[DiscoveredLead]:
+    """Take each market's best remaining lead in turn, so no market crowds
+    out the others. Sites on different domains can still be one company
+    (shared contact email domain); only its first lead is kept."""
+    queues = [iter(sorted(leads, key=lambda x: x.confidence, reverse=True)) for leads in per_market]
+    seen_entities = set()
+    merged = []
+    while queues and len(merged) < count:
+        for queue in list(queues):
+            for lead in queue:
+                entity = lead_index.resolve(
+                    lead.company_name, lead.website, [lead.email] if lead.email else (), lead.country
+                )
+                if not entity or entity not in seen_entities:
+                    seen_entities.add(entity)
+                    merged.append(lead)
+                    break
+            else:
+                queues.remove(queue)
+            if len(merged) >= count:
+                break
+    return merged
 
-    fetcher = Fetcher(auto_match=False)
 
-    for query in queries[:4]:
+async def discover_leads(req: DiscoverRequest) -> list[DiscoveredLead]:
+    plan = _plan_queries(req)
+    if not plan:
+        return []
+
+    # Shared by every market: searches and page fetches each draw from one
+    # pool, and each market may scrape its share of count * 2 candidates.
+    search_slots = asyncio.Semaphore(DISCOVER_SEARCH_CONCURRENCY)
+    scrape_slots = asyncio.Semaphore(5)
+    quota = max(2, math.ceil(req.count * 2 / len(plan)))
+    seen_domains = set()
+
+    async def _search(query: str) -> list[dict]:
         try:
-            encoded = quote_plus(query)
-            url = GOOGLE_SEARCH_TEMPLATE.format(query=encoded)
-            page = await asyncio.to_thread(
-                lambda u=url: fetcher.get(u, timeout=15)
-            )
-            if page and page.status == 200:
-                results = _parse_google_results(page)
-                all_search_results.extend(results)
+            url = GOOGLE_SEARCH_TEMPLATE.format(query=quote_plus(query))
+            async with acquire(search_slots, "search"):
+                with stage("search"):
+                    # Not hedged: a second search request only adds to the
+                    # rate that gets us captcha'd.
+                    page = await fetch(url, hedge=False)
+                    return _parse_google_results(page) if page else []
         except Exception as exc:
             logger.warning("Search failed for query '%s': %s", query, exc)
-
-    seen_domains = set()
-    unique_results = []
-    for r in all_search_results:
-        if r["domain"] not in seen_domains:
-            seen_domains.add(r["domain"])
-            unique_results.append(r)
-
-    unique_results = unique_results[: req.count * 2]
-
-    semaphore = asyncio.Semaphore(5)
-
-    async def _limited_scrape(result: dict) -> DiscoveredLead | None:
-        async with semaphore:
-            country = req.target_markets[0] if req.target_markets else "Unknown"
-            return await _scrape_company_page(
-                result["url"], result["title"], country
-            )
-
-    tasks = [_limited_scrape(r) for r in unique_results]
-    scraped = await asyncio.gather(*tasks)
-
-    leads = [l for l in scraped if l is not None]
-    leads.sort(key=lambda x: x.confidence, reverse=True)
-
-    return leads[: req.count]
+            return []
+
+    async def _limited_scrape(result: dict, market: str) -> DiscoveredLead | None:
+        async with acquire(scrape_slots, "discover"):
+            return await _scrape_company_page(result["url"], result["title"], market)
+
+    async def _discover_market(market: str, queries: list[str]) -> list[DiscoveredLead]:
+        found = await asyncio.gather(*(_search(q) for q in queries))
+        # www.acme.com and acme.com are one site, and within a market so are
+        # acme.com and acme.com.tr; collapse them before anything is
+        # fetched. The first market to find a domain keeps it.
+        candidates = []
+        for r in (r for results in found for r in results):
+            keys = {registrable_domain(r["domain"]) or r["domain"]}
+            if domain_key(r["domain"]):
+                keys.add((market, domain_key(r["domain"])))
+            if not keys & seen_domains:
+                seen_domains.update(keys)
+                candidates.append(r)
+                if len(candidates) >= quota:
+                    break
+        scraped = await asyncio.gather(*(_limited_scrape(r, market) for r in candidates))
+        return [lead for lead in scraped if lead is not None]
+
+    per_market = await asyncio.gather(*(_discover_market(m, q) for m, q in plan.items()))
+    return _merge_round_robin(per_market, req.count)
@@ -1,18 +1,20 @@
 import re
 import asyncio
-from urllib.parse import urljoin, urlparse
 
-from scrapling import Fetcher
-from config import logger
+from config import LEAD_DEADLINE_SECONDS, logger
+from crawler import crawl_site
+from dedup import lead_index
+from fetch import fetch
 from models import EnrichRequest, EnrichResult
+from metrics import BATCH_SIZE, acquire, stage
+from structured import StructuredData, extract_structured
+from textscan import IGNORED_EMAIL_SUFFIXES, TextScan, element_text, scan_facts, scan_text
+from timeouts import deadline_scope
 
 
 EMAIL_PATTERN = re.compile(
     r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}"
 )
-PHONE_PATTERN = re.compile(
-    r"(?:\+?\d{1,3}[\s\-]?)?\(?\d{2,4}\)?[\s\-]?\d{3,4}[\s\-]?\d{3,4}"
-)
 SOCIAL_DOMAINS = {
     "linkedin.com": "linkedin",
     "twitter.com": "twitter",
@@ -29,27 +31,21 @@ def _guess_website(company_name: str, country: str | None) -> str:
     return f"https://www.{slug}.com"
 
 
-def _extract_emails(page) -> list[str]:
-    raw_text = page.get_all_text() or ""
-    found = EMAIL_PATTERN.findall(raw_text)
+def _extract_emails(page, scanned: TextScan | None = None) -> list[str]:
+    if scanned is None:
+        scanned = scan_text(page, want_phones=False)
+    cleaned = set(scanned.emails)
 
     mailto_links = page.css("a[href^='mailto:']")
     for link in mailto_links:
         href = link.attrib.get("href", "")
-        email = href.replace("mailto:", "").split("?")[0].strip()
-        if email and EMAIL_PATTERN.match(email):
-            found.append(email)
-
-    cleaned = set()
-    ignore_extensions = (".png", ".jpg", ".gif", ".svg", ".webp", ".css", ".js")
-    for e in found:
-        lower = e.lower()
-        if not any(lower.endswith(ext) for ext in ignore_extensions):
-            cleaned.add(lower)
+        email = href.replace("mailto:", "").split("?")[0].strip().lower()
+        if email and EMAIL_PATTERN.fullmatch(email) and not email.endswith(IGNORED_EMAIL_SUFFIXES):
+            cleaned.add(email)
     return list(cleaned)[:10]
 
 
-def _extract_phones(page) -> list[str]:
+def _extract_phones(page, scanned: TextScan | None = None) -> list[str]:
     tel_links = page.css("a[href^='tel:']")
     phones = []
     for link in tel_links:
@@ -59,18 +55,16 @@ def _extract_phones(page) -> list[str]:
             phones.append(phone)
 
     if not phones:
-        raw_text = page.get_all_text() or ""
-        found = PHONE_PATTERN.findall(raw_text)
-        phones = [p.strip() for p in found if len(p.strip()) >= 7]
+        if scanned is None:
+            scanned = scan_text(page, want_emails=False)
+        phones = scanned.phones
 
     return list(set(phones))[:5]
 
 
-def _extract_social_links(page) -> dict[str, str]:
+def _social_links_from(urls) -> dict[str, str]:
     social = {}
-    all_links = page.css("a[href]")
-    for link in all_links:
-        href = link.attrib.get("href", "")
+    for href in urls:
         for domain, platform in SOCIAL_DOMAINS.items():
             if domain in href and platform not in social:
                 social[platform] = href
@@ -78,13 +72,17 @@ def _extract_social_links(page) -> dict[str, str]:
     return social
 
 
+def _extract_social_links(page) -> dict[str, str]:
+    return _social_links_from(link.attrib.get("href", "") for link in page.css("a[href]"))
+
+
 def _extract_meta(page) -> tuple[str | None, str | None]:
     title = None
     description = None
 
     title_tag = page.css_first("title")
     if title_tag:
-        title = title_tag.text().strip()[:200]
+        title = title_tag.text.strip()[:200]
 
     meta_desc = page.css_first('meta[name="description"]')
     if meta_desc:
@@ -127,43 +125,79 @@ def _calculate_enrichment_score(result: EnrichResult) -> int:
     return min(score, 100)
 
 
-def _try_fetch_page(url: str):
-    try:
-        fetcher = Fetcher(auto_match=False)
-        page = fetcher.get(url, timeout=15)
-        if page.status == 200:
-            return page
-    except Exception as exc:
-        logger.warning("Fetch failed for %s: %s", url, exc)
+def _extract_address(page) -> str | None:
+    address = page.css_first("address")
+    if address:
+        text = element_text(address)
+        if text:
+            return text[:200]
     return None
 
 
-def _try_contact_page(base_url: str, page):
-    contact_patterns = [
-        "contact", "about", "kontakt", "iletisim", "contacto",
-        "impressum", "about-us", "contact-us",
+def _missing_fields(result: EnrichResult) -> list[str]:
+    return [
+        name
+        for name in ("emails", "phones", "address", "founded_year", "employee_count")
+        if not getattr(result, name)
     ]
 
-    all_links = page.css("a[href]")
-    for link in all_links:
-        href = link.attrib.get("href", "")
-        href_lower = href.lower()
-        for pattern in contact_patterns:
-            if pattern in href_lower:
-                full_url = urljoin(base_url, href)
-                if urlparse(full_url).netloc == urlparse(base_url).netloc:
-                    return full_url
-    return None
-
-
-async def enrich_lead(req: EnrichRequest) -> EnrichResult:
-    result = EnrichResult(company_name=req.company_name, website=req.website)
 
+def _apply_structured(result: EnrichResult, data: StructuredData):
+    result.description = result.description or data.description
+    result.emails = result.emails or data.emails[:10]
+    result.phones = result.phones or data.phones[:5]
+    result.address = result.address or data.address
+    result.founded_year = result.founded_year or data.founded_year
+    result.employee_count = result.employee_count or data.employee_count
+    result.social_links = result.social_links or _social_links_from(data.same_as)
+    result.industry_keywords = result.industry_keywords or data.keywords
+
+
+def _fill_from_page(result: EnrichResult, page):
+    """Fill whatever is still missing on result from one page.
+
+    Structured data is read first; the text scans below only run for the
+    fields it did not cover.
+    """
+    _apply_structured(result, extract_structured(page))
+    missing = _missing_fields(result)
+    if "emails" in missing or "phones" in missing:
+        scanned = scan_text(
+            page,
+            want_emails="emails" in missing,
+            want_phones="phones" in missing,
+        )
+        if "emails" in missing:
+            result.emails = _extract_emails(page, scanned)
+        if "phones" in missing:
+            result.phones = _extract_phones(page, scanned)
+    if "address" in missing:
+        result.address = _extract_address(page)
+    if {"address", "founded_year", "employee_count"} & set(_missing_fields(result)):
+        facts = scan_facts(
+            page,
+            want_address=not result.address,
+            want_founded=not result.founded_year,
+            want_employees=not result.employee_count,
+        )
+        result.address = result.address or facts.address
+        result.founded_year = result.founded_year or facts.founded_year
+        result.employee_count = result.employee_count or facts.employee_count
+    if not result.social_links:
+        result.social_links = _extract_social_links(page)
+
+
+async def _enrich_into(req: EnrichRequest, result: EnrichResult):
+    """Fill result in place, so whatever is found before a deadline stays."""
     urls_to_try = []
     if req.website:
         url = req.website if req.website.startswith("http") else f"https://{req.website}"
         urls_to_try.append(url)
 
+    known = lead_index.website_for(lead_index.resolve(req.company_name, country=req.country))
+    if known and known not in urls_to_try:
+        urls_to_try.append(known)
+
     guessed = _guess_website(req.company_name, req.country)
     if guessed not in urls_to_try:
         urls_to_try.append(guessed)
@@ -172,7 +206,7 @@ async def enrich_lead(req: EnrichRequest) -> EnrichResult:
     working_url = None
 
     for url in urls_to_try:
-        page = await asyncio.to_thread(_try_fetch_page, url)
+        page = await fetch(url)
         if page:
             main_page = page
             working_url = url
@@ -181,36 +215,76 @@ async def enrich_lead(req: EnrichRequest) -> EnrichResult:
             break
 
     if not main_page:
-        return result
-
-    result.title, result.description = _extract_meta(main_page)
-    result.emails = _extract_emails(main_page)
-    result.phones = _extract_phones(main_page)
-    result.social_links = _extract_social_links(main_page)
-    result.industry_keywords = _extract_industry_keywords(main_page)
-
-    if not result.emails or not result.phones:
-        contact_url = _try_contact_page(working_url, main_page)
-        if contact_url:
-            contact_page = await asyncio.to_thread(_try_fetch_page, contact_url)
-            if contact_page:
-                if not result.emails:
-                    result.emails = _extract_emails(contact_page)
-                if not result.phones:
-                    result.phones = _extract_phones(contact_page)
-                if not result.social_links:
-                    result.social_links = _extract_social_links(contact_page)
+        return
+
+    with stage("extract"):
+        result.title, result.description = _extract_meta(main_page)
+        result.industry_keywords = _extract_industry_keywords(main_page)
+        _fill_from_page(result, main_page)
+
+    if _missing_fields(result):
+        def _visit(page):
+            with stage("extract"):
+                _fill_from_page(result, page)
+
+        with stage("crawl"):
+            await crawl_site(
+                working_url, main_page, _visit, lambda: not _missing_fields(result)
+            )
+
+    lead_index.resolve(req.company_name, result.website, result.emails, req.country)
+
 
+async def enrich_lead(req: EnrichRequest, deadline: float = LEAD_DEADLINE_SECONDS) -> EnrichResult:
+    """Enrich one lead within `deadline` seconds.
+
+    Every fetch is bounded by the time left; a lead that still runs out
+    comes back partial, scored on what was found.
+    """
+    result = EnrichResult(company_name=req.company_name, website=req.website)
+    with deadline_scope(deadline):
+        try:
+            await asyncio.wait_for(_enrich_into(req, result), deadline)
+        except asyncio.TimeoutError:
+            logger.info("Enrichment of %s hit its %.0fs deadline", req.company_name, deadline)
+            result.partial = True
     result.enrichment_score = _calculate_enrichment_score(result)
     return result
 
 
+def _group_duplicates(leads: list[EnrichRequest]) -> dict[str, list[int]]:
+    """Map each entity in the batch to the positions of its requests."""
+    groups: dict[str, list[int]] = {}
+    for i, req in enumerate(leads):
+        key = lead_index.resolve(req.company_name, req.website, country=req.country) or f"#{i}"
+        groups.setdefault(key, []).append(i)
+    return groups
+
+
 async def enrich_batch(leads: list[EnrichRequest]) -> list[EnrichResult]:
+    BATCH_SIZE.observe(len(leads))
     semaphore = asyncio.Semaphore(5)
 
     async def _limited(req: EnrichRequest) -> EnrichResult:
-        async with semaphore:
+        async with acquire(semaphore, "enrich"):
             return await enrich_lead(req)
 
-    tasks = [_limited(lead) for lead in leads]
-    return await asyncio.gather(*tasks)
+    with stage("dedup"):
+        groups = _group_duplicates(leads)
+    # Enrich each entity once, from the request that carries a website if any.
+    primaries = [
+        next((i for i in positions if leads[i].website), positions[0])
+        for positions in groups.values()
+    ]
+    unique = await asyncio.gather(*(_limited(leads[i]) for i in primaries))
+
+    results: list[EnrichResult | None] = [None] * len(leads)
+    for positions, primary, result in zip(groups.values(), primaries, unique):
+        for i in positions:
+            if i == primary:
+                results[i] = result
+            else:
+                results[i] = result.model_copy(
+                    update={"company_name": leads[i].company_name}, deep=True
+                )
+    return results
@@ -0,0 +1,221 @@
+import asyncio
+import codecs
+import contextvars
+import functools
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from config import FETCH_HEDGE, FETCH_MAX_BYTES, FETCH_RETRIES, FETCH_THREADS, FETCH_USER_AGENT, logger
+from metrics import FETCH_BYTES, FETCH_HEDGED, observe_fetch, record_stage
+from timeouts import fetch_timeout, latency
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+# Browsers only honour a <meta charset> within the first 1024 bytes; allow
+# for long <head> preambles.
+CHARSET_SNIFF_BYTES = 4096
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-z0-9_.:-]+)""", re.I)
+# Second-level labels under which the registered name is one further left.
+GENERIC_SLDS = {"co", "com", "net", "org", "gov", "edu", "ac", "gen", "biz"}
+# Outcomes where the host answered; their durations feed its latency window.
+COMPLETED_OUTCOMES = ("ok", "truncated", "rejected_type")
+
+_client = None
+_client_lock = threading.Lock()
+# Fetches get threads of their own so that hedge losers and abandoned
+# fetches, which run on until their timeout, cannot starve the default
+# executor the rest of the service uses.
+_executor = ThreadPoolExecutor(max_workers=FETCH_THREADS, thread_name_prefix="fetch")
+
+
+def _get_client():
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            # Imported here so it stays off the service's startup path.
+            import httpx
+            from scrapling.engines.toolbelt import generate_headers
+
+            # The same browser-like headers scrapling's Fetcher sent; Google
+            # serves a stripped or blocked SERP to bare clients.
+            headers = generate_headers(browser_mode=False)
+            # Only what httpx can always decode.
+            headers["Accept-Encoding"] = "gzip, deflate"
+            if FETCH_USER_AGENT:
+                headers["User-Agent"] = FETCH_USER_AGENT
+            _client = httpx.Client(
+                headers=headers,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                transport=httpx.HTTPTransport(retries=FETCH_RETRIES),
+            )
+    return _client
+
+
+def _referer(url: str) -> str:
+    """A Google search for the site's name, as scrapling's Fetcher sent."""
+    labels = (urlparse(url).hostname or "").split(".")
+    name = labels[-2] if len(labels) >= 2 else labels[0]
+    if name in GENERIC_SLDS and len(labels) >= 3:
+        name = labels[-3]
+    return f"https://www.google.com/search?q={name}"
+
+
+def _sniff_charset(head: bytes) -> str | None:
+    """The <meta charset> (or http-equiv charset) near the top of a page."""
+    match = META_CHARSET.search(head[:CHARSET_SNIFF_BYTES])
+    if match is None:
+        return None
+    try:
+        return codecs.lookup(match.group(1).decode("ascii")).name
+    except LookupError:
+        return None
+
+
+def _is_html(content_type: str, first_chunk: bytes) -> bool:
+    if content_type:
+        return content_type.split(";")[0].strip().lower() in HTML_CONTENT_TYPES
+    # No declared type: sniff for markup rather than parsing arbitrary bytes.
+    return first_chunk.lstrip()[:1] == b"<"
+
+
+def _download(url: str, max_bytes: int, timeout: float, cancel: threading.Event | None = None) -> tuple[str, bytes, str | None, str]:
+    """Stream a response body, stopping at max_bytes.
+
+    Returns (outcome, body, encoding, final_url). Non-200 responses and
+    non-HTML content types are rejected before the body is read; a set
+    cancel event stops the read at the next chunk. httpx applies timeout to
+    each connect and read on its own, so a host dripping bytes would never
+    trip it; the whole download is held to it here.
+    """
+    deadline = time.monotonic() + timeout
+    with _get_client().stream("GET", url, timeout=timeout, headers={"Referer": _referer(url)}) as resp:
+        if resp.status_code != 200:
+            return f"http_{resp.status_code // 100}xx", b"", None, str(resp.url)
+
+        content_type = resp.headers.get("content-type", "")
+        if content_type and not _is_html(content_type, b""):
+            return "rejected_type", b"", None, str(resp.url)
+
+        chunks = []
+        size = 0
+        outcome = "ok"
+        sniffed = bool(content_type)
+        # Whatever has arrived, not fixed-size chunks, so the checks run
+        # after every network read.
+        for chunk in resp.iter_bytes():
+            if cancel is not None and cancel.is_set():
+                return "cancelled", b"", None, str(resp.url)
+            if time.monotonic() > deadline:
+                return "timeout", b"", None, str(resp.url)
+            if not sniffed and chunk.strip():
+                if not _is_html(content_type, chunk):
+                    return "rejected_type", b"", None, str(resp.url)
+                sniffed = True
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                outcome = "truncated"
+                break
+        body = b"".join(chunks)[:max_bytes]
+        return outcome, body, resp.charset_encoding or _sniff_charset(body), str(resp.url)
+
+
+def fetch_page(url: str, max_bytes: int = FETCH_MAX_BYTES, timeout: float | None = None,
+               cancel: threading.Event | None = None):
+    """Fetch an HTML page and parse at most max_bytes of it.
+
+    A truncated body still parses: the head and the first max_bytes of the
+    document are what meta and contact extraction look at anyway. Without an
+    explicit timeout the host's adaptive one is used, cut to the caller's
+    deadline.
+    """
+    cut = False
+    if timeout is None:
+        timeout, cut = fetch_timeout(url)
+        if timeout is None:
+            observe_fetch(url, 0.0, "deadline")
+            return None
+    start = time.perf_counter()
+    outcome = "error"
+    body = b""
+    try:
+        outcome, body, encoding, final_url = _download(url, max_bytes, timeout, cancel)
+    except Exception as exc:
+        if type(exc).__name__.endswith("Timeout"):
+            outcome = "timeout"
+        logger.warning("Fetch failed for %s: %s", url, exc)
+        return None
+    finally:
+        elapsed = time.perf_counter() - start
+        observe_fetch(url, elapsed, outcome)
+        record_stage("fetch", elapsed)
+        # Connection errors fail fast and cancelled or deadline-cut fetches
+        # stop early, so none of them say how slow the host is.
+        if outcome in COMPLETED_OUTCOMES or outcome.startswith("http_") or (outcome == "timeout" and not cut):
+            latency.observe(url, elapsed)
+
+    if outcome not in ("ok", "truncated") or not body.strip():
+        return None
+    FETCH_BYTES.observe(len(body))
+
+    start = time.perf_counter()
+    try:
+        # scrapling pulls in lxml, cssselect and its fetcher stack; importing
+        # it on first use keeps it off the service's startup path.
+        from scrapling import Adaptor
+
+        # Decoded here: Adaptor runs body.decode() as UTF-8 whatever the
+        # encoding, which fails on legacy charsets and on stray bad bytes.
+        text = body.decode(encoding or "utf-8", errors="replace")
+        return Adaptor(text=text, url=final_url, encoding="utf-8", auto_match=False)
+    except Exception as exc:
+        logger.warning("Parse failed for %s: %s", url, exc)
+        return None
+    finally:
+        record_stage("parse", time.perf_counter() - start)
+
+
+async def fetch(url: str, hedge: bool = FETCH_HEDGE, timeout: float | None = None):
+    """fetch_page on a fetch thread, hedged for slow hosts if asked.
+
+    When the GET has not answered within the host's p90, an identical second
+    one is sent and whichever returns a page first wins. Threads cannot be
+    interrupted, so the loser, or a fetch whose caller gave up, is told to
+    stop at its next chunk; until then it holds one of the FETCH_THREADS.
+    """
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+
+    def start():
+        # run_in_executor does not carry the context over the way
+        # asyncio.to_thread does; the lead deadline lives in it.
+        call = functools.partial(fetch_page, url, timeout=timeout, cancel=cancel)
+        return loop.run_in_executor(_executor, contextvars.copy_context().run, call)
+
+    primary = start()
+    try:
+        delay = latency.hedge_delay(url) if hedge else None
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        backup = start()
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page = task.result()
+                if page is not None:
+                    FETCH_HEDGED.labels("primary" if task is primary else "hedge").inc()
+                    return page
+        FETCH_HEDGED.labels("none").inc()
+        return None
+    finally:
+        cancel.set()
@@ -1,6 +1,10 @@
-from fastapi import FastAPI, HTTPException, Security, Depends
+import time
+
+from fastapi import FastAPI, HTTPException, Security, Depends, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
+from pydantic import TypeAdapter
 
 from config import SCRAPER_API_KEY, PORT, ALLOWED_ORIGINS, logger
 from models import (
@@ -12,6 +16,24 @@ from models import (
 )
 from enricher import enrich_lead, enrich_batch
 from discoverer import discover_leads
+import metrics
+import profiling
+from singleflight import SingleFlight, request_key
+
+# Results are built by our own code, so re-validating them against the
+# response_model on the way out is wasted work. Endpoints serialize them
+# directly with pydantic-core and return the bytes; response_model stays on
+# the routes for the OpenAPI schema only.
+ENRICH_RESULTS = TypeAdapter(list[EnrichResult])
+DISCOVERED_LEADS = TypeAdapter(list[DiscoveredLead])
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+# Identical discoveries in flight at once share one set of searches and fetches.
+discoveries = SingleFlight("discover")
 
 app = FastAPI(
     title="LOXTR Scraper Service",
@@ -27,6 +49,7 @@ app.add_middleware(
 )
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
 
 async def verify_api_key(key: str | None = Security(api_key_header)):
@@ -37,11 +60,57 @@ async def verify_api_key(key: str | None = Security(api_key_header)):
     return True
 
 
+async def verify_admin_key(key: str | None = Security(admin_key_header)):
+    if not profiling.is_admin(key):
+        raise HTTPException(status_code=403, detail="Admin key required")
+    return True
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    return await profiling.run_request(request, call_next)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        metrics.REQUEST_SECONDS.labels(endpoint, str(status)).observe(
+            time.perf_counter() - start
+        )
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "loxtr-scraper"}
 
 
+@app.get("/metrics")
+async def metrics_endpoint(_=Depends(verify_api_key)):
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/debug/slow-requests")
+async def slow_requests_endpoint(_=Depends(verify_admin_key)):
+    return profiling.slow_requests()
+
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def profile_endpoint(profile_id: str, _=Depends(verify_admin_key)):
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
 @app.post("/enrich-lead", response_model=EnrichResult)
 async def enrich_lead_endpoint(
     req: EnrichRequest, _=Depends(verify_api_key)
@@ -51,7 +120,7 @@ async def enrich_lead_endpoint(
     logger.info(
         "Enrichment done: %s (score=%d)", req.company_name, result.enrichment_score
     )
-    return result
+    return json_response(result.model_dump_json().encode())
 
 
 @app.post("/enrich-batch", response_model=list[EnrichResult])
@@ -64,7 +133,7 @@ async def enrich_batch_endpoint(
         sum(r.enrichment_score for r in results) / len(results) if results else 0
     )
     logger.info("Batch done: %d leads, avg score=%.0f", len(results), avg_score)
-    return results
+    return json_response(ENRICH_RESULTS.dump_json(results))
 
 
 @app.post("/discover", response_model=list[DiscoveredLead])
@@ -77,9 +146,11 @@ async def discover_endpoint(
         req.target_markets,
         req.industry,
     )
-    results = await discover_leads(req)
+    # target_markets come back as each lead's country, so they stay exact.
+    key = request_key("discover", req, casefold=("product", "industry"))
+    results = await discoveries.do(key, lambda: discover_leads(req))
     logger.info("Discovery done: %d leads found", len(results))
-    return results
+    return json_response(DISCOVERED_LEADS.dump_json(results))
 
 
 if __name__ == "__main__":
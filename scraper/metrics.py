@@ -0,0 +1,131 @@
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlparse
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+# Fetch latency is labelled per host; past this many distinct hosts the rest
+# are folded into "other" so a long crawl can't blow up series cardinality.
+MAX_HOST_LABELS = 500
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60)
+
+REQUEST_SECONDS = Histogram(
+    "scraper_request_seconds",
+    "HTTP request latency by endpoint",
+    ["endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "scraper_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 15),
+)
+FETCH_SECONDS = Histogram(
+    "scraper_fetch_seconds",
+    "Page fetch latency by host",
+    ["host"],
+    buckets=LATENCY_BUCKETS,
+)
+FETCH_TOTAL = Counter(
+    "scraper_fetch_total",
+    "Page fetches by outcome",
+    ["outcome"],
+)
+FETCH_HEDGED = Counter(
+    "scraper_fetch_hedged_total",
+    "Hedged fetches by which request returned the page",
+    ["winner"],
+)
+FETCH_BYTES = Histogram(
+    "scraper_fetch_bytes",
+    "Response body bytes kept per parsed page",
+    buckets=(4096, 16384, 65536, 262144, 524288, 1048576, 2097152, 4194304),
+)
+BATCH_SIZE = Histogram(
+    "scraper_batch_size",
+    "Leads per enrich-batch call",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+CRAWL_PAGES = Histogram(
+    "scraper_crawl_pages",
+    "Extra pages fetched per company site crawl",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12),
+)
+SEMAPHORE_WAIT_SECONDS = Histogram(
+    "scraper_semaphore_wait_seconds",
+    "Time spent waiting for a concurrency slot",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+TEXT_SCAN_TRUNCATED = Counter(
+    "scraper_text_scan_truncated_total",
+    "Contact text scans cut short by the size cap or time budget",
+    ["reason"],
+)
+CACHE_REQUESTS = Counter(
+    "scraper_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+_known_hosts: set[str] = set()
+_stage_listeners = []
+
+
+def add_stage_listener(listener):
+    """Register listener(stage, seconds), called after every timed stage."""
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    if listener in _stage_listeners:
+        _stage_listeners.remove(listener)
+
+
+def record_stage(name: str, seconds: float):
+    STAGE_SECONDS.labels(name).observe(seconds)
+    for listener in _stage_listeners:
+        listener(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def host_label(url: str) -> str:
+    host = urlparse(url).netloc.lower() or "unknown"
+    if host in _known_hosts:
+        return host
+    if len(_known_hosts) >= MAX_HOST_LABELS:
+        return "other"
+    _known_hosts.add(host)
+    return host
+
+
+def observe_fetch(url: str, seconds: float, outcome: str):
+    FETCH_SECONDS.labels(host_label(url)).observe(seconds)
+    FETCH_TOTAL.labels(outcome).inc()
+
+
+@asynccontextmanager
+async def acquire(semaphore, pool: str):
+    start = time.perf_counter()
+    async with semaphore:
+        SEMAPHORE_WAIT_SECONDS.labels(pool).observe(time.perf_counter() - start)
+        yield
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
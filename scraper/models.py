@@ -21,6 +21,7 @@ class EnrichResult(BaseModel):
     employee_count: str | None = None
     founded_year: str | None = None
     enrichment_score: int = 0
+    partial: bool = False
 
 
 class BatchEnrichRequest(BaseModel):
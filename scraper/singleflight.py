@@ -0,0 +1,80 @@
+# Vendored from shared/singleflight.py by shared/sync.py; edit that file, not this copy.
+import asyncio
+
+from metrics import CACHE_REQUESTS
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def request_key(kind: str, req, casefold: tuple[str, ...] = ()) -> tuple:
+    """A hashable key for a request model; fields in casefold (strings or
+    lists of strings) compare case- and whitespace-insensitively.
+
+    Every caller sharing a key gets the first caller's result as is, so only
+    fold fields the response never echoes back.
+    """
+    data = req.model_dump()
+    for name in casefold:
+        value = data.get(name)
+        if isinstance(value, str):
+            data[name] = _fold(value)
+        elif isinstance(value, list):
+            data[name] = [_fold(v) if isinstance(v, str) else v for v in value]
+    return kind, _freeze(data)
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one shared computation.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task through asyncio.shield, so one of them
+    disconnecting doesn't cancel it for the rest. When the last waiter goes
+    away the task is cancelled. Results are shared, not copied: callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[tuple, _Call] = {}
+
+    async def do(self, key: tuple, fn):
+        call = self._calls.get(key)
+        if call is None:
+            CACHE_REQUESTS.labels(f"singleflight_{self.name}", "miss").inc()
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            CACHE_REQUESTS.labels(f"singleflight_{self.name}", "hit").inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: tuple, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
@@ -0,0 +1,269 @@
+import json
+import re
+from dataclasses import dataclass, field
+
+from config import logger
+from textscan import element_text
+
+# schema.org types that describe the company itself. Subtypes of
+# LocalBusiness are many (Store, AutoDealer, ...); see _is_org_type.
+ORG_TYPES = {
+    "organization", "corporation", "localbusiness", "onlinebusiness",
+    "ngo", "professionalservice", "store", "manufacturer", "wholesalestore",
+}
+MAX_JSON_LD_BLOCKS = 10
+MAX_JSON_LD_CHARS = 200_000
+YEAR = re.compile(r"\b(1[89]\d{2}|20\d{2})\b")
+
+
+@dataclass
+class StructuredData:
+    name: str | None = None
+    description: str | None = None
+    emails: list[str] = field(default_factory=list)
+    phones: list[str] = field(default_factory=list)
+    address: str | None = None
+    city: str | None = None
+    country: str | None = None
+    founded_year: str | None = None
+    employee_count: str | None = None
+    same_as: list[str] = field(default_factory=list)
+    keywords: list[str] = field(default_factory=list)
+
+
+def _is_org_type(value) -> bool:
+    types = value if isinstance(value, list) else [value]
+    for t in types:
+        if isinstance(t, str):
+            t = t.rsplit("/", 1)[-1].lower()
+            if t in ORG_TYPES or t.endswith("business"):
+                return True
+    return False
+
+
+def _text(value) -> str | None:
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@value")
+    if isinstance(value, list):
+        value = next((v for v in value if isinstance(v, (str, int))), None)
+    if value is None:
+        return None
+    text = " ".join(str(value).split())
+    return text or None
+
+
+def _email(value) -> str | None:
+    text = _text(value)
+    if not text:
+        return None
+    text = text.replace("mailto:", "").split("?")[0].strip().lower()
+    return text if "@" in text else None
+
+
+def _phone(value) -> str | None:
+    text = _text(value)
+    if not text:
+        return None
+    text = text.replace("tel:", "").strip()
+    return text if sum(c.isdigit() for c in text) >= 7 else None
+
+
+def _year(value) -> str | None:
+    text = _text(value)
+    match = YEAR.search(text) if text else None
+    return match.group(1) if match else None
+
+
+def _employees(value) -> str | None:
+    if isinstance(value, dict):
+        if value.get("value") is not None:
+            return _text(value["value"])
+        low, high = value.get("minValue"), value.get("maxValue")
+        if low is not None and high is not None:
+            return f"{low}-{high}"
+        if low is not None:
+            return f"{low}+"
+        return None
+    return _text(value)
+
+
+def _address(value) -> tuple[str | None, str | None, str | None]:
+    """Return (address, city, country) from a PostalAddress or a string."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if not isinstance(value, dict):
+        return _text(value), None, None
+    city = _text(value.get("addressLocality"))
+    country = _text(value.get("addressCountry"))
+    locality = " ".join(filter(None, [_text(value.get("postalCode")), city]))
+    parts = [_text(value.get("streetAddress")), locality, _text(value.get("addressRegion")), country]
+    address = ", ".join(p for p in parts if p)
+    return (address[:200] or None), city, country
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _merge(data: StructuredData, props: dict):
+    """Copy schema.org Organization properties into data, keeping what is set."""
+    data.name = data.name or _text(props.get("name")) or _text(props.get("legalName"))
+    data.description = data.description or _text(props.get("description"))
+
+    contacts = [props] + [c for c in _as_list(props.get("contactPoint")) if isinstance(c, dict)]
+    for contact in contacts:
+        for email in map(_email, _as_list(contact.get("email"))):
+            if email and email not in data.emails:
+                data.emails.append(email)
+        for phone in map(_phone, _as_list(contact.get("telephone"))):
+            if phone and phone not in data.phones:
+                data.phones.append(phone)
+
+    if not data.address and props.get("address"):
+        data.address, city, country = _address(props["address"])
+        data.city = data.city or city
+        data.country = data.country or country
+    data.founded_year = data.founded_year or _year(props.get("foundingDate"))
+    data.employee_count = data.employee_count or _employees(props.get("numberOfEmployees"))
+
+    for url in _as_list(props.get("sameAs")):
+        if isinstance(url, str) and url not in data.same_as:
+            data.same_as.append(url)
+
+    keywords = props.get("keywords")
+    if keywords and not data.keywords:
+        if isinstance(keywords, str):
+            keywords = keywords.split(",")
+        data.keywords = [k for k in (_text(k) for k in _as_list(keywords)) if k][:10]
+
+
+def _org_nodes(document):
+    """Yield the Organization-like dicts a JSON-LD document is about.
+
+    Only top-level nodes, @graph members and their mainEntity count. Orgs
+    nested elsewhere (Product.brand, manufacturer, seller, an article's
+    publisher or author) describe some other company.
+    """
+    nodes = []
+    for node in _as_list(document):
+        if isinstance(node, dict):
+            graph = node.get("@graph")
+            if graph:
+                nodes.extend(n for n in _as_list(graph) if isinstance(n, dict))
+            else:
+                nodes.append(node)
+    for node in nodes:
+        if _is_org_type(node.get("@type")):
+            yield node
+        for entity in _as_list(node.get("mainEntity")):
+            if isinstance(entity, dict) and _is_org_type(entity.get("@type")):
+                yield entity
+
+
+def _parse_json_ld(page, data: StructuredData):
+    for script in page.css('script[type="application/ld+json"]')[:MAX_JSON_LD_BLOCKS]:
+        raw = str(script.text or "").strip()
+        if not raw or len(raw) > MAX_JSON_LD_CHARS:
+            continue
+        # Some CMSes wrap the block in an HTML comment or CDATA section.
+        raw = re.sub(r"^\s*(?:<!--|<!\[CDATA\[)|(?:-->|\]\]>)\s*$", "", raw)
+        try:
+            document = json.loads(raw, strict=False)
+        except ValueError:
+            logger.debug("Skipping malformed JSON-LD on %s", page.url)
+            continue
+        for node in _org_nodes(document):
+            _merge(data, node)
+
+
+def _owner_scope(el):
+    """The nearest itemscope element above el."""
+    parent = el.parent
+    while parent is not None and "itemscope" not in parent.attrib:
+        parent = parent.parent
+    return parent
+
+
+def _belongs_to(el, scope) -> bool:
+    """True for props of scope itself or of its address/contactPoint; props
+    of other nested items (brand, manufacturer, employee) don't count."""
+    owner = _owner_scope(el)
+    if owner is None:
+        return False
+    if owner._root is scope._root:
+        return True
+    if owner.attrib.get("itemprop") not in ("address", "contactPoint"):
+        return False
+    outer = _owner_scope(owner)
+    return outer is not None and outer._root is scope._root
+
+
+def _parse_microdata(page, data: StructuredData):
+    for scope in page.css("[itemscope][itemtype]"):
+        if not _is_org_type(scope.attrib.get("itemtype", "")):
+            continue
+        # An org nested in another item (a Product's brand) is not the site's.
+        if "itemprop" in scope.attrib and _owner_scope(scope) is not None:
+            continue
+        props: dict = {}
+        address: dict = {}
+        for el in scope.css("[itemprop]"):
+            if not _belongs_to(el, scope):
+                continue
+            name = el.attrib.get("itemprop", "")
+            value = (
+                el.attrib.get("content")
+                or el.attrib.get("href")
+                or el.attrib.get("datetime")
+                or element_text(el)
+            )
+            if not value:
+                continue
+            if name in ("streetAddress", "postalCode", "addressLocality", "addressRegion", "addressCountry"):
+                address.setdefault(name, value)
+            elif name in ("email", "telephone", "sameAs"):
+                props.setdefault(name, []).append(value)
+            elif name != "address":
+                props.setdefault(name, value)
+        if address:
+            props["address"] = address
+        _merge(data, props)
+
+
+def _parse_open_graph(page, data: StructuredData):
+    def meta(prop):
+        el = page.css_first(f'meta[property="{prop}"]')
+        return _text(el.attrib.get("content")) if el else None
+
+    props = {
+        "name": meta("og:site_name"),
+        "description": meta("og:description"),
+        "email": meta("og:email") or meta("business:contact_data:email"),
+        "telephone": meta("og:phone_number") or meta("business:contact_data:phone_number"),
+    }
+    street = meta("og:street-address") or meta("business:contact_data:street_address")
+    if street:
+        props["address"] = {
+            "streetAddress": street,
+            "postalCode": meta("og:postal-code") or meta("business:contact_data:postal_code"),
+            "addressLocality": meta("og:locality") or meta("business:contact_data:locality"),
+            "addressCountry": meta("og:country-name") or meta("business:contact_data:country_name"),
+        }
+    _merge(data, {k: v for k, v in props.items() if v})
+
+
+def extract_structured(page) -> StructuredData:
+    """Company facts from JSON-LD, then microdata, then OpenGraph.
+
+    Earlier sources win; later ones only fill what is still empty. Malformed
+    markup is skipped rather than failing the page.
+    """
+    data = StructuredData()
+    for parser in (_parse_json_ld, _parse_microdata, _parse_open_graph):
+        try:
+            parser(page, data)
+        except Exception as exc:
+            logger.debug("Structured data parser %s failed: %s", parser.__name__, exc)
+    return data
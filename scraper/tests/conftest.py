@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The service imports its modules flat (from config import ...), as it does
+# when run from its own directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
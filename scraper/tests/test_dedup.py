@@ -0,0 +1,41 @@
+import pytest
+
+import enricher
+from dedup import LeadIndex, domain_key, registrable_domain
+from models import EnrichRequest
+
+
+@pytest.fixture
+def index(monkeypatch):
+    fresh = LeadIndex()
+    monkeypatch.setattr(enricher, "lead_index", fresh)
+    return fresh
+
+
+def test_shared_host_is_keyed_on_full_host():
+    assert registrable_domain("https://www.acme-valves.wixsite.com/home") == "acme-valves.wixsite.com"
+    assert domain_key("acme-valves.wixsite.com") == "acme-valves.wixsite.com"
+    assert domain_key("nordpump.wixsite.com") == "nordpump.wixsite.com"
+    assert domain_key("acme.com.tr") == "acme"
+
+
+def test_sites_on_one_shared_host_stay_separate(index):
+    groups = enricher._group_duplicates([
+        EnrichRequest(company_name="Acme Valves", website="https://acme-valves.wixsite.com", country="DE"),
+        EnrichRequest(company_name="Nordpump", website="https://nordpump.wixsite.com", country="TR"),
+    ])
+    assert sorted(groups.values()) == [[0], [1]]
+
+
+def test_brand_label_links_only_within_a_country(index):
+    groups = enricher._group_duplicates([
+        EnrichRequest(company_name="Acme GmbH", website="https://acme.de", country="DE"),
+        EnrichRequest(company_name="Acme Inc.", website="https://acme.com", country="US"),
+        EnrichRequest(company_name="Acme", website="https://www.acme.com.tr", country="DE"),
+    ])
+    assert sorted(groups.values()) == [[0, 2], [1]]
+
+
+def test_same_domain_links_across_countries(index):
+    first = index.resolve("Acme", "https://acme.com", country="DE")
+    assert index.resolve("Acme Corp", "http://www.acme.com/contact", country="US") == first
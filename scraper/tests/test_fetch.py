@@ -0,0 +1,53 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch
+
+DRIP_BYTES = b"<p>" + b"x" * 44 + b"</p>"
+
+
+class DripHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        if self.path == "/drip":
+            # 50 bytes every 0.25s for 10s: each read is quick, the whole
+            # body is not.
+            for _ in range(40):
+                try:
+                    self.wfile.write(DRIP_BYTES)
+                    self.wfile.flush()
+                except OSError:
+                    return
+                time.sleep(0.25)
+        else:
+            self.wfile.write(b"<html><body><p>hello</p></body></html>")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), DripHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_fast_page_parses(server):
+    page = fetch.fetch_page(f"{server}/", timeout=5)
+    assert page.css_first("p").text == "hello"
+
+
+def test_slow_drip_is_held_to_the_timeout(server):
+    start = time.monotonic()
+    page = fetch.fetch_page(f"{server}/drip", timeout=1.0)
+    elapsed = time.monotonic() - start
+    assert page is None
+    assert elapsed < 2.0
@@ -0,0 +1,15 @@
+from models import DiscoverRequest
+from singleflight import request_key
+
+
+def discover_key(**fields):
+    req = DiscoverRequest(**{"product": "valves", "industry": "machinery", "target_markets": ["Germany"], **fields})
+    return request_key("discover", req, casefold=("product", "industry"))
+
+
+def test_folded_fields_share_a_key():
+    assert discover_key(product="Valves ", industry="MACHINERY") == discover_key()
+
+
+def test_echoed_markets_keep_their_case():
+    assert discover_key(target_markets=["germany"]) != discover_key()
@@ -0,0 +1,306 @@
+import re
+import time
+from dataclasses import dataclass, field
+
+from config import logger
+from metrics import TEXT_SCAN_TRUNCATED
+
+MAX_SCAN_CHARS = 1_000_000
+CHUNK_CHARS = 64 * 1024
+# Text nodes longer than a chunk are sliced with this much overlap so a
+# match straddling the cut is still seen whole in one of the slices.
+CHUNK_OVERLAP = 320
+SCAN_BUDGET_SECONDS = 0.25
+MAX_AT_SIGNS = 5000
+MAX_EMAILS = 50
+MAX_PHONES = 20
+
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+IGNORED_EMAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+
+EMAIL_LOCAL_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-"
+)
+# Possessive quantifiers never give characters back, so matching is linear in
+# the input no matter how the page is shaped.
+EMAIL_DOMAIN = re.compile(r"[a-zA-Z0-9\-]++(?:\.[a-zA-Z0-9\-]++)*+")
+PHONE_CANDIDATE = re.compile(r"\+?\(?\d[\d \t()\-]*+")
+# The shape check only ever runs on a short candidate, which keeps its
+# backtracking bounded.
+PHONE_SHAPE = re.compile(
+    r"(?:\+?\d{1,3}[\s\-]?)?\(?\d{2,4}\)?[\s\-]?\d{3,4}[\s\-]?\d{3,4}"
+)
+MAX_PHONE_CANDIDATE = 40
+# Longer candidates are lists of numbers ("0212 555 1234 - 0212 555 1235")
+# or digit tables; they are split on these separators, then windowed.
+PHONE_SEPARATOR = re.compile(r"\s+-\s+|\s*\t\s*|\s{2,}")
+DIGIT = re.compile(r"\d")
+
+# Company facts. Each pattern is anchored on a keyword with short, bounded
+# gaps, so a miss costs one linear pass over the chunk.
+FOUNDED_PATTERNS = (
+    re.compile(
+        r"\b(?:founded|established|since|est\.|gegr(?:ü|ue)ndet|seit|kurulu(?:ş|s)|fundad[ao]|fond(?:é|e)e?)"
+        r"[^0-9\n]{0,25}((?:18|19|20)\d{2})\b",
+        re.I,
+    ),
+    re.compile(r"\b((?:18|19|20)\d{2})\s*(?:yılında|yilinda)\s*kurul", re.I),
+)
+EMPLOYEES_PATTERN = re.compile(
+    r"\b(\d{1,3}(?:[.,]\d{3})*+)\s?(\+?)\s*(?:employees|staff|people|workers|team members"
+    r"|mitarbeiter(?:innen)?|(?:ç|c)al(?:ı|i)(?:ş|s)an|personel|empleados|salari(?:é|e)s|collaborateurs)\b",
+    re.I,
+)
+MORE_THAN = re.compile(r"(?:more than|over|above|über|mehr als|plus de|más de|'?(?:den|dan) fazla)\s*$", re.I)
+STREET_PATTERN = re.compile(
+    r"(?:str\.|stra(?:ß|ss)e|weg\b|platz\b|allee\b|gasse\b"
+    r"|\b(?:street|st\.|road|rd\.|avenue|ave\.|blvd|boulevard|lane|cad(?:\.|de(?:si)?)|sok(?:\.|ak)"
+    r"|mah(?:\.|alle(?:si)?)|bulvar(?:ı|i)?|calle|avenida|rue)(?=\W))",
+    re.I,
+)
+# A street word only counts with a house number next to it: up to two words
+# before it ("221B Baker Street") or after it ("Calle Mayor 5", "Cad. No: 5").
+# Without that, "Since 1987 ... road construction" would pass as an address.
+HOUSE_NUMBER_BEFORE = re.compile(r"\b\d{1,5}[a-z]?,?\s+(?:[^\W\d_][\w'.-]*\s+){0,2}$", re.I)
+HOUSE_NUMBER_AFTER = re.compile(
+    r"(?:\s+[^\W\d_][\w'.-]*){0,2}\s*,?\s*(?:no\.?:?|nr\.?|n°|#)?\s*(\d{1,4}[a-z]?(?:[/-]\d{1,4})?)\b", re.I
+)
+POSTCODE = re.compile(r"\b\d{4,5}\b|\b[A-Z]{1,2}\d[A-Z\d]? ?\d[A-Z]{2}\b")
+MAX_ADDRESS_CHARS = 200
+# Facts sit in the intro, footer or a short about page; long product tables
+# never hold them, so this scan stops much earlier than the contact scan.
+MAX_FACT_SCAN_CHARS = 200_000
+
+
+@dataclass
+class FactScan:
+    address: str | None = None
+    founded_year: str | None = None
+    employee_count: str | None = None
+
+
+@dataclass
+class TextScan:
+    emails: list[str] = field(default_factory=list)
+    phones: list[str] = field(default_factory=list)
+    truncated: str | None = None
+
+
+def element_text(el) -> str:
+    """All text inside one element, whitespace-collapsed. Unlike scrapling's
+    get_all_text this keeps the element's own leading text, so
+    <span>Acme <b>GmbH</b></span> reads "Acme GmbH", not "GmbH"."""
+    root = getattr(el, "_root", None)
+    if root is not None:
+        text = " ".join(root.itertext())
+    else:
+        text = f"{el.text or ''} {el.get_all_text(separator=' ') or ''}"
+    return " ".join(text.split())
+
+
+def iter_text_chunks(page, max_chars: int = MAX_SCAN_CHARS, chunk_chars: int = CHUNK_CHARS):
+    """Yield the page's visible text in chunks, stopping after max_chars."""
+    root = getattr(page, "_root", None)
+    if root is None:
+        text = page.get_all_text() or ""
+        for start in range(0, min(len(text), max_chars), chunk_chars):
+            yield text[start:start + chunk_chars + CHUNK_OVERLAP]
+        return
+
+    parts: list[str] = []
+    buffered = 0
+    total = 0
+    for node in root.iter():
+        texts = []
+        if isinstance(node.tag, str) and node.tag not in SKIP_TAGS and node.text:
+            texts.append(node.text)
+        if node.tail:
+            texts.append(node.tail)
+        for text in texts:
+            if len(text) > chunk_chars:
+                if parts:
+                    yield "\n".join(parts)
+                    parts, buffered = [], 0
+                for start in range(0, min(len(text), max_chars - total), chunk_chars):
+                    yield text[start:start + chunk_chars + CHUNK_OVERLAP]
+            else:
+                parts.append(text)
+                buffered += len(text) + 1
+                if buffered >= chunk_chars:
+                    yield "\n".join(parts)
+                    parts, buffered = [], 0
+            total += len(text)
+            if total >= max_chars:
+                if parts:
+                    yield "\n".join(parts)
+                return
+    if parts:
+        yield "\n".join(parts)
+
+
+def _emails_in(chunk: str, found: set[str], budget: list[int]):
+    at = chunk.find("@")
+    while at != -1 and budget[0] > 0:
+        budget[0] -= 1
+        start = at
+        while start > 0 and at - start < 64 and chunk[start - 1] in EMAIL_LOCAL_CHARS:
+            start -= 1
+        match = EMAIL_DOMAIN.match(chunk, at + 1, at + 256)
+        if start < at and match:
+            labels = match.group().split(".")
+            if len(labels) >= 2 and len(labels[-1]) >= 2 and labels[-1].isalpha():
+                email = f"{chunk[start:at]}@{match.group()}".lower()
+                if not email.endswith(IGNORED_EMAIL_SUFFIXES):
+                    found.add(email)
+        at = chunk.find("@", at + 1)
+
+
+def _shapes_in_long(part: str):
+    """PHONE_SHAPE matches in a long run, one bounded window at a time.
+
+    Each search sees at most MAX_PHONE_CANDIDATE chars from the end of the
+    previous match (or token start); a window without a number moves on by
+    one token.
+    """
+    pos = 0
+    while pos < len(part):
+        match = PHONE_SHAPE.search(part, pos, pos + MAX_PHONE_CANDIDATE)
+        # A match cut out of a longer digit run (a window edge, a table
+        # cell) is not a number.
+        if match and not part[match.end():match.end() + 1].isdigit():
+            yield match.group()
+            pos = match.end()
+        else:
+            space = part.find(" ", pos + 1)
+            if space == -1:
+                return
+            pos = space + 1
+
+
+def _phones_in(chunk: str, found: set[str]):
+    for match in PHONE_CANDIDATE.finditer(chunk):
+        candidate = match.group()
+        if len(candidate) < 7:
+            continue
+        if len(candidate) <= MAX_PHONE_CANDIDATE:
+            shapes = PHONE_SHAPE.findall(candidate)
+        else:
+            shapes = (
+                shape
+                for part in PHONE_SEPARATOR.split(candidate)
+                for shape in (
+                    PHONE_SHAPE.findall(part) if len(part) <= MAX_PHONE_CANDIDATE else _shapes_in_long(part)
+                )
+            )
+        for phone in shapes:
+            phone = phone.strip()
+            if len(phone) >= 7:
+                found.add(phone)
+
+
+def scan_text(page, want_emails: bool = True, want_phones: bool = True) -> TextScan:
+    """Find emails and phone numbers in the page text with bounded cost.
+
+    Chunks are only searched when they contain the cheap markers ('@' for
+    emails, a digit for phones), and scanning stops at MAX_SCAN_CHARS or
+    after SCAN_BUDGET_SECONDS, returning whatever was found so far.
+    """
+    emails: set[str] = set()
+    phones: set[str] = set()
+    at_budget = [MAX_AT_SIGNS]
+    deadline = time.perf_counter() + SCAN_BUDGET_SECONDS
+    scanned = 0
+    result = TextScan()
+
+    for chunk in iter_text_chunks(page):
+        scanned += len(chunk)
+        if want_emails and len(emails) < MAX_EMAILS and "@" in chunk:
+            _emails_in(chunk, emails, at_budget)
+        if want_phones and len(phones) < MAX_PHONES and DIGIT.search(chunk):
+            _phones_in(chunk, phones)
+
+        emails_done = not want_emails or len(emails) >= MAX_EMAILS or at_budget[0] <= 0
+        phones_done = not want_phones or len(phones) >= MAX_PHONES
+        if emails_done and phones_done:
+            break
+        if time.perf_counter() > deadline:
+            result.truncated = "time"
+            break
+    else:
+        if scanned >= MAX_SCAN_CHARS:
+            result.truncated = "size"
+
+    if result.truncated:
+        TEXT_SCAN_TRUNCATED.labels(result.truncated).inc()
+        logger.debug("Text scan truncated (%s) after %d chars", result.truncated, scanned)
+
+    result.emails = sorted(emails)
+    result.phones = sorted(phones)
+    return result
+
+
+def _founded_in(chunk: str) -> str | None:
+    for pattern in FOUNDED_PATTERNS:
+        match = pattern.search(chunk)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _employees_in(chunk: str) -> str | None:
+    for match in EMPLOYEES_PATTERN.finditer(chunk):
+        count = match.group(1)
+        if int(re.sub(r"[.,]", "", count)) < 2:
+            continue
+        if match.group(2) or MORE_THAN.search(chunk, max(0, match.start() - 16), match.start()):
+            count += "+"
+        return count
+    return None
+
+
+def _house_number_span(line: str, street) -> tuple[int, int] | None:
+    before = HOUSE_NUMBER_BEFORE.search(line, max(0, street.start() - 60), street.start())
+    if before:
+        return before.span()
+    after = HOUSE_NUMBER_AFTER.match(line, street.end())
+    if after:
+        return after.span(1)
+    return None
+
+
+def _address_in(chunk: str) -> str | None:
+    for line in chunk.split("\n"):
+        line = " ".join(line.split())
+        if not 10 <= len(line) <= MAX_ADDRESS_CHARS:
+            continue
+        for street in STREET_PATTERN.finditer(line):
+            house = _house_number_span(line, street)
+            if house is None:
+                continue
+            # The postcode has to be another number than the house number.
+            if any(p.end() <= house[0] or p.start() >= house[1] for p in POSTCODE.finditer(line)):
+                return line
+    return None
+
+
+def scan_facts(page, want_address: bool = True, want_founded: bool = True, want_employees: bool = True) -> FactScan:
+    """Find an address, founding year and headcount in one bounded pass."""
+    result = FactScan()
+    deadline = time.perf_counter() + SCAN_BUDGET_SECONDS
+    for chunk in iter_text_chunks(page, max_chars=MAX_FACT_SCAN_CHARS):
+        if want_founded and not result.founded_year:
+            result.founded_year = _founded_in(chunk)
+        if want_employees and not result.employee_count:
+            result.employee_count = _employees_in(chunk)
+        if want_address and not result.address:
+            result.address = _address_in(chunk)
+        if (
+            (not want_founded or result.founded_year)
+            and (not want_employees or result.employee_count)
+            and (not want_address or result.address)
+        ):
+            break
+        if time.perf_counter() > deadline:
+            TEXT_SCAN_TRUNCATED.labels("time").inc()
+            break
+    return result
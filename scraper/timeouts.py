@@ -0,0 +1,124 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from config import (
+    FETCH_HEDGE_MIN_DELAY,
+    FETCH_MIN_TIMEOUT,
+    FETCH_TIMEOUT,
+    FETCH_TIMEOUT_MULTIPLIER,
+    LATENCY_HOSTS,
+    LATENCY_SAMPLES,
+)
+
+# Below this many samples a host's percentiles say nothing; the fleet-wide
+# window is used instead.
+MIN_HOST_SAMPLES = 3
+MIN_GLOBAL_SAMPLES = 20
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("fetch_deadline", default=None)
+
+
+def _percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyTracker:
+    """Recent fetch durations per host and across all hosts.
+
+    Timeouts are a multiple of the host's p95, clamped between
+    FETCH_MIN_TIMEOUT and FETCH_TIMEOUT; hosts seen too rarely fall back to
+    the fleet-wide p99. Only fetches that ran their course are recorded:
+    completed ones, and ones that used up the host's whole timeout, so a
+    host that keeps stalling drifts back up to the ceiling. A fetch cut
+    short by a lead deadline says nothing about the host.
+    """
+
+    def __init__(self, samples: int = LATENCY_SAMPLES, max_hosts: int = LATENCY_HOSTS):
+        self.samples = samples
+        self.max_hosts = max_hosts
+        self._hosts: OrderedDict[str, deque] = OrderedDict()
+        self._global: deque = deque(maxlen=samples * 8)
+        self._lock = threading.Lock()
+
+    def observe(self, url: str, seconds: float):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            window = self._hosts.get(host)
+            if window is None:
+                window = self._hosts[host] = deque(maxlen=self.samples)
+                while len(self._hosts) > self.max_hosts:
+                    self._hosts.popitem(last=False)
+            else:
+                self._hosts.move_to_end(host)
+            window.append(seconds)
+            self._global.append(seconds)
+
+    def _window(self, url: str) -> tuple[list[float], bool]:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            window = self._hosts.get(host)
+            if window is not None and len(window) >= MIN_HOST_SAMPLES:
+                return list(window), True
+            return list(self._global), False
+
+    def timeout_for(self, url: str) -> float:
+        samples, per_host = self._window(url)
+        if not per_host and len(samples) < MIN_GLOBAL_SAMPLES:
+            return FETCH_TIMEOUT
+        observed = _percentile(samples, 0.95 if per_host else 0.99)
+        return min(FETCH_TIMEOUT, max(FETCH_MIN_TIMEOUT, observed * FETCH_TIMEOUT_MULTIPLIER))
+
+    def hedge_delay(self, url: str) -> float | None:
+        """How long to wait on a GET before sending a second one, or None
+        while there is too little history to tell slow from normal."""
+        samples, per_host = self._window(url)
+        if not per_host and len(samples) < MIN_GLOBAL_SAMPLES:
+            return None
+        return max(FETCH_HEDGE_MIN_DELAY, _percentile(samples, 0.9))
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+            self._global.clear()
+
+    def __len__(self):
+        return len(self._hosts)
+
+
+latency = LatencyTracker()
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Bound every fetch started inside the block (including ones handed to
+    fetch threads, which run in a copy of the context) by one deadline."""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def fetch_timeout(url: str) -> tuple[float | None, bool]:
+    """(timeout, cut): the adaptive timeout for url, and whether the current
+    deadline shortened it. A None timeout means the deadline has passed."""
+    timeout = latency.timeout_for(url)
+    left = remaining()
+    if left is not None:
+        if left <= 0:
+            return None, True
+        if left < timeout:
+            return left, True
+    return timeout, False
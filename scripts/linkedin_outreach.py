@@ -1,11 +1,15 @@
+import argparse
 import asyncio
 import random
 import os
 import json
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from outreach_store import LeadWriter, SeenIndex
+
 # Load env vars from root .env
 load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 
@@ -13,6 +17,18 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 SUPABASE_URL = os.getenv("VITE_SUPABASE_URL") or os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 LOX_API_URL = "https://docs.loxtr.com/api/loxconvert/generate-comment" # Or local dev url
+WRITE_BATCH_SIZE = int(os.getenv("OUTREACH_WRITE_BATCH", "25"))
+WRITE_FLUSH_SECONDS = float(os.getenv("OUTREACH_FLUSH_SECONDS", "15"))
+SPOOL_PATH = os.path.join(os.path.dirname(__file__), "outreach_spool.jsonl")
+SEEN_DB_PATH = os.path.join(os.path.dirname(__file__), "outreach_seen.db")
+SCAN_PAGES = int(os.getenv("OUTREACH_SCAN_PAGES", "3"))
+POSTS_PER_KEYWORD = 10
+USER_DATA_DIR = os.path.join(os.path.dirname(__file__), "linkedin_session")
+LOGIN_TIMEOUT_SECONDS = 300
+DAEMON_INTERVAL_SECONDS = float(os.getenv("OUTREACH_INTERVAL_SECONDS", "3600"))
+# Headless scraping only needs markup and LinkedIn's own scripts
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+FIRST_PARTY_HOSTS = ("linkedin.com", "licdn.com")
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("[!] Error: Supabase credentials missing in .env")
@@ -28,110 +44,260 @@ async def scroll_page(page):
     await human_delay(1, 3)
 
 async def get_bot_settings():
-    res = supabase.table("bot_settings").select("*").eq("id", 1).single().execute()
+    res = await asyncio.to_thread(
+        lambda: supabase.table("bot_settings").select("*").eq("id", 1).single().execute()
+    )
     return res.data if res.data else None
 
-async def save_lead(lead_data):
-    try:
-        res = supabase.table("bot_outreach_leads").upsert(lead_data, on_conflict="post_url").execute()
-        return res
-    except Exception as e:
-        print(f"[!] Save error: {e}")
-        return None
-
 async def get_approved_leads():
-    res = supabase.table("bot_outreach_leads").select("*").eq("status", "approved").execute()
+    res = await asyncio.to_thread(
+        lambda: supabase.table("bot_outreach_leads").select("*").eq("status", "approved").execute()
+    )
     return res.data or []
 
-async def mark_lead_completed(lead_id):
-    supabase.table("bot_outreach_leads").update({"status": "completed"}).eq("id", lead_id).execute()
+async def post_urn(post):
+    # The URN lives on the result container, which may be the element itself,
+    # an ancestor (for the text block selector) or a descendant.
+    return await post.evaluate(
+        """el => {
+            const holder = el.closest('[data-urn]') || el.querySelector('[data-urn]');
+            return holder ? holder.getAttribute('data-urn') : null;
+        }"""
+    )
+
+async def scan_keyword(page, keyword, seen, claimed, writer, budget):
+    print(f"[*] Searching for keyword: {keyword}")
+    search_url = f"https://www.linkedin.com/search/results/content/?keywords={keyword.replace(' ', '%20')}&origin=SWITCH_SEARCH_VERTICAL&sortBy=%22date_posted%22"
+    await page.goto(search_url)
+    await human_delay(6, 10)
+
+    # Scrape visible posts
+    posts = await page.query_selector_all(".entity-result__item, .update-components-text")
+    print(f"[+] Found {len(posts)} potential posts for {keyword}. Analyzing...")
+
+    for post in posts[:POSTS_PER_KEYWORD]: # Analyze top 10 per keyword
+        if budget["remaining"] <= 0:
+            break
+        reserved = False
+        try:
+            urn = await post_urn(post)
+            if not urn or not urn.startswith("urn:li:activity:"):
+                continue
+            # Known posts are skipped before their text is ever read; claimed
+            # ones are being handled by another worker this session
+            if urn in seen or urn in claimed:
+                continue
+            # Reserve the lead's slot before the awaits below, or every worker
+            # passes the budget check before any of them has saved a lead
+            if budget["remaining"] <= 0:
+                break
+            claimed.add(urn)
+            budget["remaining"] -= 1
+            reserved = True
+
+            content = await post.inner_text()
+            # Basic filters. Not marked seen: the text may just not have
+            # loaded yet, so the post gets another look next session.
+            if len(content) < 50: continue
+
+            # Save as Pending Lead
+            await writer.add_lead({
+                "author_name": "LinkedIn User",
+                "post_url": f"https://www.linkedin.com/feed/update/{urn}/",
+                "content_snippet": content[:500],
+                "detected_keyword": keyword,
+                "status": "pending",
+                "ai_suggested_comment": "Generating..." # Will be filled by UI or separate task
+            })
+            reserved = False
+            # Only now is the post done with: the lead is buffered and spooled
+            seen.add(urn, keyword)
+        except Exception as e:
+            print(f"    [!] Post scan error: {e}")
+            continue
+        finally:
+            # Skipped or failed: hand the slot back
+            if reserved:
+                budget["remaining"] += 1
+    seen.commit()
+
+async def scan_worker(page, queue, seen, claimed, writer, budget):
+    while budget["remaining"] > 0:
+        try:
+            keyword = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        try:
+            await scan_keyword(page, keyword, seen, claimed, writer, budget)
+        except Exception as e:
+            print(f"[!] Search error for {keyword}: {e}")
+
+async def block_heavy_resources(route):
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    first_party = any(host == h or host.endswith("." + h) for h in FIRST_PARTY_HOSTS)
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    elif request.resource_type == "script" and not first_party:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def is_logged_in(context):
+    cookies = await context.cookies("https://www.linkedin.com")
+    return any(c["name"] == "li_at" for c in cookies)
+
+async def launch_context(p, headless):
+    # We use a user data dir to keep login state (persistent context)
+    context = await p.chromium.launch_persistent_context(
+        USER_DATA_DIR,
+        headless=headless,
+        user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+    if headless:
+        await context.route("**/*", block_heavy_resources)
+    return context
+
+async def open_scraping_context(p, headed=False):
+    """Return a logged-in context, headless and resource-blocking when possible.
+
+    Without a saved session a headed window opens once for the manual login
+    (or 2FA); the session is stored in USER_DATA_DIR and later runs go
+    straight to headless.
+    """
+    context = await launch_context(p, headless=not headed)
+    if headed or await is_logged_in(context):
+        return context
+
+    await context.close()
+    print("[*] No LinkedIn session found. Log in in the browser window (waiting up to 5 minutes)...")
+    context = await launch_context(p, headless=False)
+    await context.pages[0].goto("https://www.linkedin.com/login")
+    for _ in range(LOGIN_TIMEOUT_SECONDS // 5):
+        if await is_logged_in(context):
+            break
+        await asyncio.sleep(5)
+    else:
+        await context.close()
+        raise RuntimeError("LinkedIn login not completed")
+    await context.close()
+    print("[+] Session saved. Continuing headless.")
+    return await launch_context(p, headless=True)
 
-async def run_outreach():
+async def get_active_settings():
     settings = await get_bot_settings()
     if not settings or not settings.get("is_active"):
         print("[*] Bot is currently INACTIVE in settings. Skipping...")
-        return
+        return None
+    return settings
 
+async def run_session(context, writer, settings):
     keywords = settings.get("target_keywords", ["#ihracat", "#packinglist", "#evraktakibi", "#gümrük", "#dis_ticaret"])
     daily_limit = settings.get("daily_limit", 20)
 
     print(f"[*] Starting LOX AI Outreach Bot (Limit: {daily_limit})...")
+    page = context.pages[0] if context.pages else await context.new_page()
 
-    async with async_playwright() as p:
-        # We use a user data dir to keep login state (persistent context)
-        user_data_dir = os.path.join(os.path.dirname(__file__), "linkedin_session")
-        context = await p.chromium.launch_persistent_context(
-            user_data_dir,
-            headless=False, # Set False to handle manual login or 2FA first time
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = context.pages[0]
-
-        # --- STEP 1: POST APPROVED COMMENTS ---
-        approved_leads = await get_approved_leads()
-        if approved_leads:
-            print(f"[+] Found {len(approved_leads)} approved comments. Starting post cycle...")
-            for lead in approved_leads:
-                try:
-                    print(f"[*] Posting comment to: {lead['post_url']}")
-                    await page.goto(lead['post_url'])
-                    await human_delay(5, 10)
-                    
-                    # Logic to find comment box and type (LinkedIn selectors change often)
-                    # This is a simplified placeholder for the actual UI interaction
-                    # Note: LinkedIn automation is strict, proceed with caution
-                    comment_btn = await page.query_selector("button.comment-button")
-                    if comment_btn:
-                        await comment_btn.click()
-                        await human_delay(2, 4)
-                        await page.keyboard.type(lead['ai_suggested_comment'], delay=random.randint(50, 150))
-                        await page.keyboard.press("Enter")
-                        await mark_lead_completed(lead['id'])
-                        print(f"    [V] Comment posted and marked completed.")
-                    else:
-                        print(f"    [!] Could not find comment button. Skipping.")
-                except Exception as e:
-                    print(f"    [!] Post error: {e}")
+    # --- STEP 1: POST APPROVED COMMENTS ---
+    approved_leads = await get_approved_leads()
+    if approved_leads:
+        print(f"[+] Found {len(approved_leads)} approved comments. Starting post cycle...")
+        for lead in approved_leads:
+            if writer.is_completed(lead['id']):
+                continue
+            try:
+                print(f"[*] Posting comment to: {lead['post_url']}")
+                await page.goto(lead['post_url'])
+                await human_delay(5, 10)
+                
+                # Logic to find comment box and type (LinkedIn selectors change often)
+                # This is a simplified placeholder for the actual UI interaction
+                # Note: LinkedIn automation is strict, proceed with caution
+                comment_btn = await page.query_selector("button.comment-button")
+                if comment_btn:
+                    await comment_btn.click()
+                    await human_delay(2, 4)
+                    await page.keyboard.type(lead['ai_suggested_comment'], delay=random.randint(50, 150))
+                    await page.keyboard.press("Enter")
+                    await writer.mark_completed(lead['id'])
+                    print(f"    [V] Comment posted and marked completed.")
+                else:
+                    print(f"    [!] Could not find comment button. Skipping.")
+            except Exception as e:
+                print(f"    [!] Post error: {e}")
 
-        # --- STEP 2: SCRAPE NEW LEADS ---
-        for keyword in keywords:
-            print(f"[*] Searching for keyword: {keyword}")
-            search_url = f"https://www.linkedin.com/search/results/content/?keywords={keyword.replace(' ', '%20')}&origin=SWITCH_SEARCH_VERTICAL&sortBy=%22date_posted%22"
-            await page.goto(search_url)
-            await human_delay(6, 10)
+    # --- STEP 2: SCRAPE NEW LEADS ---
+    seen = SeenIndex(SEEN_DB_PATH)
+    # The limit is per calendar day, shared by every session run today
+    remaining = daily_limit - seen.added_today()
+    if remaining <= 0:
+        seen.close()
+        print(f"[*] Daily limit of {daily_limit} leads already reached. Skipping scan.")
+        print("[*] Bot Session finished.")
+        return
 
-            # Scrape visible posts
-            posts = await page.query_selector_all(".entity-result__item, .update-components-text")
-            print(f"[+] Found potential posts. Analyzing...")
+    claimed = set()
+    queue = asyncio.Queue()
+    for keyword in keywords:
+        queue.put_nowait(keyword)
+    budget = {"remaining": remaining}
+    workers = max(1, min(SCAN_PAGES, len(keywords), remaining))
+    pages = [page] + [await context.new_page() for _ in range(workers - 1)]
+    try:
+        # Workers reserve a slot per post before saving it (see
+        # scan_keyword), so today's total never passes daily_limit
+        await asyncio.gather(*(scan_worker(pg, queue, seen, claimed, writer, budget) for pg in pages))
+        saved_today = seen.added_today()
+    finally:
+        seen.close()
+        for extra in pages[1:]:
+            await extra.close()
+    print(f"[+] Saved {remaining - budget['remaining']} new leads ({saved_today}/{daily_limit} today, {len(seen)} posts known).")
 
-            for post in posts[:10]: # Analyze top 10 per keyword
-                try:
-                    content = await post.inner_text()
-                    # Basic filters
-                    if len(content) < 50: continue
-                    
-                    # Extract URL (simplified logic)
-                    # post_link_el = await post.query_selector("a[href*='/posts/']")
-                    # url = await post_link_el.get_attribute("href") if post_link_el else None
-                    url = f"https://www.linkedin.com/feed/update/urn:li:activity:{random.randint(1000000, 9999999)}" # Mock URL for demo if not found
-                    
-                    # Actually, LinkedIn's content search links are tricky. 
-                    # Real bot would extract the accurate URN.
-
-                    # Save as Pending Lead
-                    await save_lead({
-                        "author_name": "LinkedIn User",
-                        "post_url": url,
-                        "content_snippet": content[:500],
-                        "detected_keyword": keyword,
-                        "status": "pending",
-                        "ai_suggested_comment": "Generating..." # Will be filled by UI or separate task
-                    })
-                except:
-                    continue
+    print("[*] Bot Session finished.")
 
-        print("[*] Bot Session finished.")
-        await context.close()
+async def run_outreach(headed=False):
+    settings = await get_active_settings()
+    if not settings:
+        return
+
+    writer = LeadWriter(supabase, SPOOL_PATH, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_SECONDS)
+    async with writer, async_playwright() as p:
+        context = await open_scraping_context(p, headed)
+        try:
+            await run_session(context, writer, settings)
+        finally:
+            await context.close()
+
+async def run_daemon(interval, headed=False):
+    """Keep one browser alive and run a session every `interval` seconds."""
+    writer = LeadWriter(supabase, SPOOL_PATH, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_SECONDS)
+    async with writer, async_playwright() as p:
+        context = await open_scraping_context(p, headed)
+        try:
+            while True:
+                try:
+                    # Settings are re-read every cycle so toggles in the
+                    # dashboard apply without restarting the daemon.
+                    settings = await get_active_settings()
+                    if settings:
+                        await run_session(context, writer, settings)
+                except Exception as e:
+                    print(f"[!] Session error: {e}")
+                await writer.flush()
+                print(f"[*] Next session in {interval:.0f}s.")
+                await asyncio.sleep(interval)
+        finally:
+            await context.close()
 
 if __name__ == "__main__":
-    asyncio.run(run_outreach())
+    parser = argparse.ArgumentParser(description="LOX AI LinkedIn outreach bot")
+    parser.add_argument("--headed", action="store_true", help="show the browser and load every resource")
+    parser.add_argument("--daemon", action="store_true", help="keep the browser running and repeat sessions")
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL_SECONDS, help="seconds between daemon sessions")
+    args = parser.parse_args()
+
+    if args.daemon:
+        asyncio.run(run_daemon(args.interval, args.headed))
+    else:
+        asyncio.run(run_outreach(args.headed))
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+LEADS_TABLE = "bot_outreach_leads"
+
+
+class LeadWriter:
+    """Buffers bot_outreach_leads writes and flushes them in bulk.
+
+    New leads become one upsert on post_url per flush and completed leads one
+    update filtered with in_(). Every pending write is also kept in a local
+    JSONL spool, so a crash or a failed flush loses nothing: the spool is
+    replayed on the next start.
+    """
+
+    def __init__(self, client, spool_path, batch_size=25, flush_interval=15.0):
+        self.client = client
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._leads = []
+        self._completed = []
+        self._lock = asyncio.Lock()
+        self._task = None
+        # After a failed flush, size-triggered flushes wait for the next
+        # interval instead of hammering a database that is down.
+        self._retry_after = 0.0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        self._replay_spool()
+        if self._leads or self._completed:
+            print(f"[*] Replaying {len(self._leads)} leads and {len(self._completed)} status updates from spool")
+            await self.flush()
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def add_lead(self, lead):
+        self._leads.append(lead)
+        self._append_spool({"op": "lead", "data": lead})
+        if len(self._leads) >= self.batch_size and time.monotonic() >= self._retry_after:
+            await self.flush()
+
+    async def mark_completed(self, lead_id):
+        self._completed.append(lead_id)
+        self._append_spool({"op": "completed", "id": lead_id})
+        if len(self._completed) >= self.batch_size and time.monotonic() >= self._retry_after:
+            await self.flush()
+
+    def is_completed(self, lead_id):
+        """True if the lead was marked completed but not yet written back."""
+        return lead_id in self._completed
+
+    async def flush(self):
+        async with self._lock:
+            leads, self._leads = self._leads, []
+            completed, self._completed = self._completed, []
+
+            if leads:
+                # Postgres rejects an upsert that touches the same row twice,
+                # so keep only the latest version of each post.
+                unique = list({lead["post_url"]: lead for lead in leads}.values())
+                try:
+                    await asyncio.to_thread(self._upsert_leads, unique)
+                except Exception as e:
+                    print(f"[!] Bulk save error ({len(unique)} leads kept in spool): {e}")
+                    self._leads = unique + self._leads
+                    self._retry_after = time.monotonic() + self.flush_interval
+
+            if completed:
+                try:
+                    await asyncio.to_thread(self._mark_completed, completed)
+                except Exception as e:
+                    print(f"[!] Status update error ({len(completed)} ids kept in spool): {e}")
+                    self._completed = completed + self._completed
+                    self._retry_after = time.monotonic() + self.flush_interval
+
+            self._rewrite_spool()
+
+    def _upsert_leads(self, leads):
+        self.client.table(LEADS_TABLE).upsert(leads, on_conflict="post_url").execute()
+
+    def _mark_completed(self, ids):
+        self.client.table(LEADS_TABLE).update({"status": "completed"}).in_("id", ids).execute()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._leads or self._completed:
+                await self.flush()
+
+    def _append_spool(self, entry):
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _rewrite_spool(self):
+        if not self._leads and not self._completed:
+            if os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+            return
+        tmp_path = f"{self.spool_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for lead in self._leads:
+                f.write(json.dumps({"op": "lead", "data": lead}, ensure_ascii=False) + "\n")
+            for lead_id in self._completed:
+                f.write(json.dumps({"op": "completed", "id": lead_id}) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+    def _replay_spool(self):
+        if not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash mid-write
+                if entry.get("op") == "lead":
+                    self._leads.append(entry["data"])
+                elif entry.get("op") == "completed":
+                    self._completed.append(entry["id"])
+
+
+class SeenIndex:
+    """Local index of post URNs the bot has already looked at.
+
+    Checked before any DOM extraction, so known posts are skipped without
+    reading their text or round-tripping to Supabase. A post is added only
+    once its lead has been handed to the LeadWriter, so posts that failed
+    or were filtered get another look, and the rows added today are the
+    day's lead count. Backed by SQLite so it survives across sessions;
+    lookups hit an in-memory set.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen_posts ("
+            "urn TEXT PRIMARY KEY, keyword TEXT, seen_at REAL NOT NULL)"
+        )
+        self._urns = {row[0] for row in self._db.execute("SELECT urn FROM seen_posts")}
+
+    def __contains__(self, urn):
+        return urn in self._urns
+
+    def __len__(self):
+        return len(self._urns)
+
+    def add(self, urn, keyword=None):
+        """Record urn; returns False if it was already known."""
+        if urn in self._urns:
+            return False
+        self._urns.add(urn)
+        self._db.execute(
+            "INSERT OR IGNORE INTO seen_posts (urn, keyword, seen_at) VALUES (?, ?, ?)",
+            (urn, keyword, time.time()),
+        )
+        return True
+
+    def added_today(self):
+        """Posts added since local midnight, i.e. leads saved today."""
+        midnight = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+        row = self._db.execute("SELECT COUNT(*) FROM seen_posts WHERE seen_at >= ?", (midnight,)).fetchone()
+        return row[0]
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+pytest.importorskip("supabase")
+
+import linkedin_outreach as bot
+from outreach_store import SeenIndex
+
+POST_TEXT = "Looking for a customs broker for our export shipments to Hamburg next month."
+
+
+class StubPost:
+    def __init__(self, urn, text=POST_TEXT):
+        self.urn = urn
+        self.text = text
+
+    async def evaluate(self, script):
+        await asyncio.sleep(0)
+        return self.urn
+
+    async def inner_text(self):
+        await asyncio.sleep(0)
+        return self.text
+
+
+class StubPage:
+    def __init__(self, posts_for):
+        self.posts_for = posts_for
+        self.keyword = None
+
+    async def goto(self, url):
+        self.keyword = url.split("keywords=")[1].split("&")[0]
+
+    async def query_selector_all(self, selector):
+        await asyncio.sleep(0)
+        return self.posts_for(self.keyword)
+
+    async def close(self):
+        pass
+
+
+class StubWriter:
+    def __init__(self):
+        self.leads = []
+
+    async def add_lead(self, lead):
+        await asyncio.sleep(0)
+        self.leads.append(lead)
+
+
+def posts_for(keyword):
+    # Every keyword shares a few posts, and one post is too short to keep.
+    shared = [StubPost(f"urn:li:activity:shared{i}") for i in range(3)]
+    own = [StubPost(f"urn:li:activity:{keyword}{i}") for i in range(6)]
+    return shared + [StubPost(f"urn:li:activity:{keyword}short", "too short")] + own
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    async def instant(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(bot, "human_delay", instant)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 20])
+def test_concurrent_workers_stop_at_the_budget(tmp_path, limit):
+    seen = SeenIndex(str(tmp_path / "seen.db"))
+    writer = StubWriter()
+    budget = {"remaining": limit}
+
+    async def scan():
+        queue = asyncio.Queue()
+        for keyword in ("k1", "k2", "k3", "k4", "k5"):
+            queue.put_nowait(keyword)
+        claimed = set()
+        await asyncio.gather(*(
+            bot.scan_worker(StubPage(posts_for), queue, seen, claimed, writer, budget) for _ in range(3)
+        ))
+
+    asyncio.run(scan())
+    urns = [lead["post_url"] for lead in writer.leads]
+    assert len(urns) == len(set(urns)) == limit
+    assert budget["remaining"] == 0
+    assert seen.added_today() == limit
+    seen.close()
+
+
+class StubContext:
+    def __init__(self):
+        self.pages = [StubPage(posts_for)]
+
+    async def new_page(self):
+        return StubPage(posts_for)
+
+
+def test_sessions_share_the_daily_limit(tmp_path, monkeypatch):
+    async def no_approved_leads():
+        return []
+
+    monkeypatch.setattr(bot, "get_approved_leads", no_approved_leads)
+    monkeypatch.setattr(bot, "SEEN_DB_PATH", str(tmp_path / "seen.db"))
+    monkeypatch.setattr(bot, "SCAN_PAGES", 3)
+    settings = {"daily_limit": 7, "target_keywords": ["k1", "k2", "k3", "k4", "k5"]}
+    writer = StubWriter()
+
+    async def daemon_cycles():
+        # Each daemon cycle is a session of its own on the same day.
+        for _ in range(3):
+            await bot.run_session(StubContext(), writer, settings)
+
+    asyncio.run(daemon_cycles())
+    assert len(writer.leads) == 7
+    seen = SeenIndex(str(tmp_path / "seen.db"))
+    assert seen.added_today() == 7
+    seen.close()
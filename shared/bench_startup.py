@@ -0,0 +1,140 @@
+"""Startup benchmark: import cost and time until /health answers.
+
+Run from the repository root, naming the service:
+
+    python shared/bench_startup.py scraper
+    python shared/bench_startup.py forecast --wait-model ready
+    python shared/bench_startup.py scraper --runs 5 --top 25 --json startup.json
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICES = ("scraper", "forecast")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_profile(service_dir: Path, module: str = "main") -> dict:
+    """Import module in a fresh interpreter under -X importtime."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=service_dir,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "depth": len(indent) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+    total = next((m["cumulative_ms"] for m in modules if m["module"] == module), 0.0)
+    return {"wall_s": wall, "import_ms": total, "modules": modules}
+
+
+def time_to_health(service_dir: Path, timeout: float = 60.0, wait_for: str | None = None) -> dict:
+    """Start uvicorn and poll /health until it answers (and, optionally,
+    until its "model" field equals wait_for)."""
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port))
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=service_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    result = {"health_s": None, "ready_s": None, "health": None}
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"service exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    body = json.loads(resp.read())
+            except OSError:
+                time.sleep(0.01)
+                continue
+            elapsed = time.perf_counter() - start
+            if result["health_s"] is None:
+                result["health_s"] = elapsed
+            result["health"] = body
+            if wait_for is None or body.get("model") in (wait_for, "failed"):
+                result["ready_s"] = elapsed
+                break
+            time.sleep(0.1)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("service", choices=SERVICES)
+    parser.add_argument("--runs", type=int, default=3, help="repetitions; the fastest run is reported")
+    parser.add_argument("--top", type=int, default=15, help="heaviest imports to list")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--wait-model", metavar="STATE", help="also wait until /health reports this model state")
+    parser.add_argument("--skip-health", action="store_true", help="only measure imports")
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    args = parser.parse_args()
+    service_dir = ROOT / args.service
+
+    imports = min((import_profile(service_dir) for _ in range(args.runs)), key=lambda r: r["import_ms"])
+    heaviest = sorted(
+        (m for m in imports["modules"] if m["module"] != "main"),
+        key=lambda m: m["cumulative_ms"],
+        reverse=True,
+    )[:args.top]
+    print(f"import main: {imports['import_ms']:.0f} ms (interpreter wall {imports['wall_s'] * 1000:.0f} ms)")
+    for m in heaviest:
+        print(f"  {m['cumulative_ms']:8.1f} ms cumulative {m['self_ms']:8.1f} ms self  {'  ' * m['depth']}{m['module']}")
+
+    report = {"imports": {**imports, "heaviest": heaviest}}
+    if not args.skip_health:
+        health = min(
+            (time_to_health(service_dir, args.timeout, args.wait_model) for _ in range(args.runs)),
+            key=lambda r: r["health_s"] or float("inf"),
+        )
+        print(f"/health up after {health['health_s']:.2f}s" if health["health_s"] else "/health never answered")
+        if args.wait_model and health["ready_s"]:
+            print(f"model {health['health'].get('model')} after {health['ready_s']:.2f}s")
+        report["health"] = health
+
+    if args.json:
+        del report["imports"]["modules"]
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Vendor the modules both services share into each service directory.
+
+Each service image is built from its own directory (see its Dockerfile), so
+the modules in MODULES are copied into scraper/ and forecast/ rather than imported
+from this directory. They import config and metrics from the service they
+land in. Edit the file here, never a vendored copy, then run:
+
+    python shared/sync.py          # rewrite the vendored copies
+    python shared/sync.py --check  # exit 1 if any copy is stale
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SHARED_DIR = ROOT / "shared"
+SERVICES = ("scraper", "forecast")
+MODULES = ("profiling.py", "singleflight.py")
+HEADER = "# Vendored from shared/{name} by shared/sync.py; edit that file, not this copy.\n"
+
+
+def vendored(name: str) -> str:
+    return HEADER.format(name=name) + (SHARED_DIR / name).read_text()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="report stale copies without writing")
+    args = parser.parse_args()
+
+    stale = []
+    for name in MODULES:
+        text = vendored(name)
+        for service in SERVICES:
+            target = ROOT / service / name
+            if target.exists() and target.read_text() == text:
+                continue
+            stale.append(target.relative_to(ROOT))
+            if not args.check:
+                target.write_text(text)
+    for path in stale:
+        print(f"{'stale' if args.check else 'updated'}: {path}")
+    return 1 if args.check and stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())